@@ -1,3 +1,4 @@
+import asyncio
 import argparse
 import logging.config
 import uuid
@@ -25,7 +26,9 @@ def main():
         raw_address=args.address,
     )
     service_data_parser = Parser(city=user.address.city)
-    result = service_data_parser.parse(SupportedService.ELECTRICITY, user_address=user.address)
+    result = asyncio.run(
+        service_data_parser.parse(SupportedService.ELECTRICITY, user_address=user.address)
+    )
     logger.info(f"Parse Result: \n{result}")
     user.send_notification(result)
 
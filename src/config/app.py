@@ -17,8 +17,10 @@ class SupportedService(enum.StrEnum):
 
     @classmethod
     def members(cls) -> list["SupportedService"]:
-        # TODO: use correct logic: list(map(lambda x: x.value, cls))
-        return [cls.ELECTRICITY]
+        """Services which have registered providers (see src.parsing.registry)"""
+        from src.parsing.registry import get_services  # the registry depends on this module
+
+        return get_services()
 
 
 PROJECT_PATH = Path(__file__).parent.parent.absolute()
@@ -54,3 +56,51 @@ TG_TEST_USERS_LIST = os.getenv("TG_TEST_USERS_LIST", "").split(",")
 TG_TEST_CHAT_IDS = os.getenv("TG_TEST_CHAT_IDS", "").split(",")
 
 TMP_DATA_DIR = PROJECT_PATH.parent / ".data"
+DB_PATH = Path(os.getenv("DB_PATH", DATA_PATH / "tg_housing.sqlite3"))
+# interval (in seconds) between background refreshes of all schedules (and notifications)
+SCHEDULE_REFRESH_INTERVAL = int(os.getenv("SCHEDULE_REFRESH_INTERVAL", "900"))
+# max random delay (in seconds) added to each refresh's interval
+SCHEDULE_REFRESH_JITTER = int(os.getenv("SCHEDULE_REFRESH_JITTER", "60"))
+# max time (in seconds) given to started refresh callbacks (notifications) on shutdown
+SCHEDULE_CALLBACKS_SHUTDOWN_TIMEOUT = float(os.getenv("SCHEDULE_CALLBACKS_SHUTDOWN_TIMEOUT", "10"))
+# max delay (in seconds) between storage's update and its writing to the DB
+STORAGE_FLUSH_DELAY = float(os.getenv("STORAGE_FLUSH_DELAY", "1.0"))
+
+# Shared HTTP client (used for fetching all upstream resources)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_USE_HTTP2 = os.getenv("HTTP_USE_HTTP2", "false").lower() == "true"
+# max count of simultaneous requests to the same upstream host
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "4"))
+# max rate of requests to the same upstream host (0 - unlimited)
+HTTP_MAX_REQUESTS_PER_SECOND = float(os.getenv("HTTP_MAX_REQUESTS_PER_SECOND", "10"))
+# timeout (in seconds) of fetching shutdowns for a single (service, address) pair
+SHUTDOWNS_FETCH_TIMEOUT = float(os.getenv("SHUTDOWNS_FETCH_TIMEOUT", "20"))
+# upstream resource isn't requested for RESET_TIMEOUT seconds after THRESHOLD failures in a row
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3"))
+CIRCUIT_BREAKER_RESET_TIMEOUT = float(os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT", "60"))
+
+# Cache of fetched pages (TTLs are in seconds, max size is in bytes)
+CACHE_PATH = DATA_PATH / "cache"
+CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", "3600"))
+CACHE_TTL = {
+    SupportedService.ELECTRICITY: int(os.getenv("CACHE_TTL_ELECTRICITY", CACHE_DEFAULT_TTL)),
+    SupportedService.COLD_WATER: int(os.getenv("CACHE_TTL_COLD_WATER", CACHE_DEFAULT_TTL)),
+    SupportedService.HOT_WATER: int(os.getenv("CACHE_TTL_HOT_WATER", CACHE_DEFAULT_TTL)),
+}
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 100 * 1024 * 1024))
+CACHE_MEMORY_MAX_ITEMS = int(os.getenv("CACHE_MEMORY_MAX_ITEMS", "32"))
+
+# Parse pages incrementally (while downloading) instead of building the whole page's DOM
+PARSER_STREAMING = os.getenv("PARSER_STREAMING", "true").lower() == "true"
+# requested date range is fetched by chunks of this size in days (0 - by single request)
+PARSER_CHUNK_DAYS = int(os.getenv("PARSER_CHUNK_DAYS", "7"))
+# max cache TTL (in seconds) of far-future chunks
+PARSER_CHUNK_MAX_TTL = int(os.getenv("PARSER_CHUNK_MAX_TTL", 24 * 3600))
+# query parameter of paginated listings (e.g. "?PAGEN_1=2") and max count of linked pages
+# crawled by single parsing (in addition to the first pages of all date range's chunks)
+PARSER_PAGE_PARAM = os.getenv("PARSER_PAGE_PARAM", "PAGEN_1")
+PARSER_MAX_PAGES = int(os.getenv("PARSER_MAX_PAGES", "50"))
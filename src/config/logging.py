@@ -2,6 +2,8 @@ import os
 
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", default="DEBUG")
+# per-row tracing of parsed pages (very verbose): set "DEBUG" to enable
+PARSER_TRACE_LEVEL = os.getenv("PARSER_TRACE_LEVEL", default="INFO")
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -15,6 +17,7 @@ LOGGING_CONFIG = {
     "loggers": {
         "src": {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False},
         "parsing": {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False},
+        "parsing.trace": {"handlers": ["console"], "level": PARSER_TRACE_LEVEL, "propagate": False},
         "aiogram": {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False},
     },
 }
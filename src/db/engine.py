@@ -0,0 +1,46 @@
+"""Shared SQLAlchemy engine (SQLite database in WAL mode) and metadata of the app's tables"""
+
+from pathlib import Path
+
+from sqlalchemy import Engine, MetaData, create_engine, event
+
+from src.config.app import DB_PATH
+
+metadata = MetaData()
+
+_engine: Engine | None = None
+
+
+def create_db_engine(db_path: Path | str = DB_PATH) -> Engine:
+    """
+    Creates an engine for the SQLite database: WAL mode allows reading while writing is in
+    progress, so short per-record writes don't block readers (e.g. other chats' handlers)
+    """
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    return engine
+
+
+def get_engine() -> Engine:
+    """Returns the app's shared engine (it is created on the first call)"""
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine()
+
+    return _engine
+
+
+def dispose_engine() -> None:
+    """Closes all pooled connections of the shared engine"""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
@@ -1,14 +1,23 @@
 import json
+import asyncio
+import contextlib
 import logging
 import dataclasses
-from collections import defaultdict
-from typing import Any, DefaultDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
 
+from aiogram.fsm.state import State
 from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+from sqlalchemy import Engine, Connection, select, delete, exists
+from sqlalchemy.dialects.sqlite import insert
 
-from src.config.app import TMP_DATA_DIR
+from src.config.app import TMP_DATA_DIR, STORAGE_FLUSH_DELAY
+from src.db.engine import get_engine
+from src.db.tables import user_data_table, fsm_state_table, subscribers_table
+from src.db.utils import create_tables, save_subscriber_addresses
 
 logger = logging.getLogger(__name__)
+T = TypeVar("T")
 
 
 @dataclasses.dataclass
@@ -26,55 +35,194 @@ class UserDataRecord:
 
 class TGStorage(BaseStorage):
     """
-    TMP solution: support integrating aiogram storage's logic with user's data
+    Integrates aiogram storage's logic with user's data and FSM states (stored in SQLite DB).
+    Records are loaded lazily (on the first request). Updates are kept by write-behind buffer:
+    all changes made during `flush_delay` seconds are written by one batched transaction
+    (only changed rows are upserted). DB queries are executed by the dedicated thread,
+    so they don't block the event loop.
     """
 
-    data_file_path = TMP_DATA_DIR / "user_address.json"
-
-    def __init__(self) -> None:
-        self.storage: dict[int, UserDataRecord] = self._load_from_file()
-        self.state: DefaultDict[StorageKey, StateType] = defaultdict(None)
+    legacy_data_file_path = TMP_DATA_DIR / "user_address.json"
+
+    def __init__(self, engine: Engine | None = None, flush_delay: float = STORAGE_FLUSH_DELAY):
+        self.engine = engine or get_engine()
+        self.flush_delay = flush_delay
+        self.storage: dict[int, UserDataRecord] = {}
+        self.state: dict[str, str | None] = {}
+        self._pending_data: dict[int, UserDataRecord] = {}
+        self._pending_states: dict[str, str | None] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tg-storage")
+        create_tables(self.engine)
+        self._migrate_from_file()
+        self._migrate_subscribers()
 
     async def set_state(self, key: StorageKey, state: StateType = None) -> None:
-        self.state[key] = state
+        state_key = self._state_key(key)
+        state_value = state.state if isinstance(state, State) else state
+        self.state[state_key] = state_value
+        self._pending_states[state_key] = state_value
+        self._schedule_flush()
 
-    async def get_state(self, key: StorageKey) -> StateType | None:
-        return self.state.get(key)
+    async def get_state(self, key: StorageKey) -> str | None:
+        state_key = self._state_key(key)
+        if state_key not in self.state:
+            self.state[state_key] = await self._run(self._load_state, state_key)
 
-    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
-        if not (user_data := self.storage.get(key.user_id)):
-            user_data = UserDataRecord(id=key.user_id)
+        return self.state[state_key]
 
-        user_data.data = data
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        user_data = UserDataRecord(id=key.user_id, data=data.copy())
         self.storage[key.user_id] = user_data
-        self._save_to_file()
+        self._pending_data[key.user_id] = user_data
+        self._schedule_flush()
 
     async def get_data(self, key: StorageKey) -> dict[str, Any]:
-        if user_data := self.storage.get(key.user_id):
-            return user_data.data
-
-        return {}
+        if (user_data := self.storage.get(key.user_id)) is None:
+            user_data = await self._run(self._load_record, key.user_id)
+            self.storage[key.user_id] = user_data
+
+        return user_data.data.copy()
+
+    async def flush(self) -> None:
+        """Writes all buffered changes to the DB (by single transaction)"""
+        if not (self._pending_data or self._pending_states):
+            return
+
+        pending_data, self._pending_data = self._pending_data, {}
+        pending_states, self._pending_states = self._pending_states, {}
+        try:
+            await self._run(self._save_changes, list(pending_data.values()), pending_states)
+        except BaseException:
+            # keep changes for the next flushing (newer changes have priority),
+            # cancelled flushing (e.g. by closing) must not lose the swapped batch too
+            self._pending_data = pending_data | self._pending_data
+            self._pending_states = pending_states | self._pending_states
+            raise
 
     async def close(self) -> None:
-        pass
-
-    def _save_to_file(self) -> None:
-        """Temp method for saving user's address (will be placed to use SQLite instead"""
-        if not self.data_file_path.exists():
-            self.data_file_path.touch()
-
-        with open(self.data_file_path, "wt") as f:
-            data = {user_id: data_record.dump() for user_id, data_record in self.storage.items()}
-            json.dump(data, f)
-
-    def _load_from_file(self) -> dict[int, UserDataRecord]:
-        """Temp method for saving user's address (will be placed to use SQLite instead"""
-        data = {}
-        if self.data_file_path.exists():
+        """Stops delayed flushing and writes all buffered changes"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            # the task can be flushing right now: its batch is restored once it is cancelled
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+
+            self._flush_task = None
+
+        await self.flush()
+        self._executor.shutdown(wait=True)
+
+    def _schedule_flush(self) -> None:
+        """Starts delayed flushing (if it isn't started yet): one write per `flush_delay`"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        # changes made while flushing is in progress (or failed ones) are flushed by next round
+        while self._pending_data or self._pending_states:
+            await asyncio.sleep(self.flush_delay)
             try:
-                with open(self.data_file_path, "rt") as f:
-                    data = json.load(f)
+                await self.flush()
             except Exception as exc:
-                logger.exception("Couldn't read from storage file: %r", exc)
-
-        return {int(user_id): UserDataRecord.load(user_data) for user_id, user_data in data.items()}
+                logger.exception("Couldn't flush storage's changes: %r", exc)
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _state_key(key: StorageKey) -> str:
+        return ":".join(
+            str(part) if part is not None else ""
+            for part in (
+                key.bot_id,
+                key.chat_id,
+                key.user_id,
+                key.thread_id,
+                key.business_connection_id,
+                key.destiny,
+            )
+        )
+
+    def _save_changes(
+        self, user_data_records: list[UserDataRecord], states: dict[str, str | None]
+    ) -> None:
+        with self.engine.begin() as connection:
+            if user_data_records:
+                self._save_records(connection, user_data_records)
+
+            if new_states := [
+                {"key": key, "state": state} for key, state in states.items() if state is not None
+            ]:
+                query = insert(fsm_state_table)
+                query = query.on_conflict_do_update(
+                    index_elements=[fsm_state_table.c.key],
+                    set_={"state": query.excluded.state},
+                )
+                connection.execute(query, new_states)
+
+            if removed_states := [key for key, state in states.items() if state is None]:
+                connection.execute(
+                    delete(fsm_state_table).where(fsm_state_table.c.key.in_(removed_states))
+                )
+
+    @staticmethod
+    def _save_records(connection: Connection, user_data_records: list[UserDataRecord]) -> None:
+        """Upserts user's data and syncs normalized subscriber's addresses"""
+        query = insert(user_data_table)
+        query = query.on_conflict_do_update(
+            index_elements=[user_data_table.c.user_id],
+            set_={"data": query.excluded.data},
+        )
+        connection.execute(
+            query,
+            [{"user_id": record.id, "data": record.data} for record in user_data_records],
+        )
+        for record in user_data_records:
+            save_subscriber_addresses(connection, record.id, record.data.get("addresses") or [])
+
+    def _load_record(self, user_id: int) -> UserDataRecord:
+        query = select(user_data_table.c.data).where(user_data_table.c.user_id == user_id)
+        with self.engine.connect() as connection:
+            data = connection.execute(query).scalar_one_or_none()
+
+        return UserDataRecord(id=user_id, data=data or {})
+
+    def _load_state(self, state_key: str) -> str | None:
+        query = select(fsm_state_table.c.state).where(fsm_state_table.c.key == state_key)
+        with self.engine.connect() as connection:
+            return connection.execute(query).scalar_one_or_none()
+
+    def _migrate_from_file(self) -> None:
+        """Moves user's data from the legacy JSON file (if it exists) to the DB"""
+        if not self.legacy_data_file_path.exists():
+            return
+
+        try:
+            with open(self.legacy_data_file_path, "rt") as f:
+                data = json.load(f)
+        except Exception as exc:
+            logger.exception("Couldn't read from legacy storage file: %r", exc)
+            return
+
+        records = [UserDataRecord.load(user_data) for user_data in data.values()]
+        if records:
+            with self.engine.begin() as connection:
+                self._save_records(connection, records)
+
+        self.legacy_data_file_path.rename(self.legacy_data_file_path.with_suffix(".json.migrated"))
+        logger.info("Migrated %i user's records from legacy storage file", len(records))
+
+    def _migrate_subscribers(self) -> None:
+        """Fills subscribers' addresses for user's data which were stored before them"""
+        with self.engine.begin() as connection:
+            if connection.execute(select(exists(subscribers_table.select()))).scalar():
+                return
+
+            records = [
+                UserDataRecord(id=user_id, data=data)
+                for user_id, data in connection.execute(select(user_data_table))
+            ]
+            if records:
+                self._save_records(connection, records)
+                logger.info("Migrated addresses of %i subscribers", len(records))
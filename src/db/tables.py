@@ -0,0 +1,113 @@
+"""Tables of the app's database"""
+
+from sqlalchemy import (
+    Table,
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    DateTime,
+    JSON,
+    ForeignKey,
+    Index,
+    func,
+)
+
+from src.db.engine import metadata
+
+user_data_table = Table(
+    "user_data",
+    metadata,
+    Column("user_id", BigInteger, primary_key=True, autoincrement=False),
+    Column("data", JSON, nullable=False, default=dict),
+)
+
+fsm_state_table = Table(
+    "fsm_state",
+    metadata,
+    Column("key", String, primary_key=True),
+    Column("state", String, nullable=False),
+)
+
+# TG user (private chat with the bot) which is subscribed to some addresses
+subscribers_table = Table(
+    "subscribers",
+    metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=False),
+    Column("created_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+)
+
+# subscriber's addresses (street is normalized, see src.utils.normalize_street)
+addresses_table = Table(
+    "addresses",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column(
+        "subscriber_id",
+        BigInteger,
+        ForeignKey("subscribers.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    ),
+    Column("city", String, nullable=False),
+    Column("street", String, nullable=False),
+    Column("house", Integer, nullable=True),
+    Column("raw", String, nullable=False),
+    Index("ix_addresses_city_street_house", "city", "street", "house"),
+)
+
+# parsed outages: each row is a range of houses on the street with single date range
+outages_table = Table(
+    "outages",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("city", String, nullable=False),
+    Column("service", String, nullable=False),
+    Column("street", String, nullable=False),
+    Column("house_start", Integer, nullable=False),
+    Column("house_end", Integer, nullable=False),
+    Column("raw", String, nullable=False),
+    Column("start_time", DateTime, nullable=True),
+    Column("end_time", DateTime, nullable=True),
+    Index("ix_outages_city_street_houses", "city", "street", "house_start", "house_end"),
+    Index("ix_outages_end_time", "end_time"),
+)
+
+# subscribers whose whole schedule is matched by the next notifying of the city's service
+# (their addresses are changed or sending to them has failed), others get outages of diffs only
+pending_notifications_table = Table(
+    "pending_notifications",
+    metadata,
+    Column(
+        "subscriber_id",
+        BigInteger,
+        ForeignKey("subscribers.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("city", String, primary_key=True),
+    Column("service", String, primary_key=True),
+)
+
+# time of the stored outages' data (of the last stored schedule) per city's service
+schedules_table = Table(
+    "schedules",
+    metadata,
+    Column("city", String, primary_key=True),
+    Column("service", String, primary_key=True),
+    Column("fetched_at", DateTime, nullable=False),
+)
+
+# outages which are already sent to the subscriber (fingerprint: service, address and dates)
+sent_notifications_table = Table(
+    "sent_notifications",
+    metadata,
+    Column(
+        "subscriber_id",
+        BigInteger,
+        ForeignKey("subscribers.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("fingerprint", String, primary_key=True),
+    Column("end_time", DateTime, nullable=True, index=True),
+    Column("created_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+)
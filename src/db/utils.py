@@ -1,59 +1,506 @@
 """Small module for DB-related operations"""
 
-import sqlite3
-from datetime import datetime
+import datetime
+from typing import NamedTuple, TYPE_CHECKING
 
+from sqlalchemy import Engine, Connection, select, delete, and_, or_, bindparam
+from sqlalchemy.dialects.sqlite import insert
 
-def create_table(db_name):
+from src.config.app import SupportedCity, SupportedService
+from src.db.engine import get_engine, metadata
+from src.db.models import Address, DateRange
+from src.db.tables import (
+    subscribers_table,
+    addresses_table,
+    outages_table,
+    schedules_table,
+    sent_notifications_table,
+    pending_notifications_table,
+)
+from src.utils import normalize_street
+
+if TYPE_CHECKING:
+    from src.parsing.diff import ScheduleDiff
+    from src.parsing.index import ScheduleIndex
+
+
+class StoredOutage(NamedTuple):
+    street: str
+    house_start: int
+    house_end: int
+    raw: str
+    date_range: DateRange
+
+
+class SubscriberAddress(NamedTuple):
+    subscriber_id: int
+    city: SupportedCity
+    street: str
+    house: int | None
+    raw: str
+
+
+class SentNotification(NamedTuple):
+    subscriber_id: int
+    fingerprint: str
+    end_time: datetime.datetime | None
+
+
+class AffectedSubscriber(NamedTuple):
+    subscriber_id: int
+    service: SupportedService
+    address: str
+    outage_address: str
+    start: datetime.datetime | None
+    end: datetime.datetime | None
+
+
+def create_tables(engine: Engine | None = None) -> None:
+    """
+    Create all app's tables (and their indexes) if they do not already exist.
+
+    Parameters:
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    None
     """
-    Create a table in the specified SQLite database if it does not already exist.
+    metadata.create_all(engine or get_engine())
+
+
+def save_subscriber_addresses(
+    connection: Connection, subscriber_id: int, raw_addresses: list[str]
+) -> None:
+    """
+    Replaces the subscriber's addresses by the given ones (they are stored in normalized form).
+    If the addresses are changed, the subscriber's schedules are matched by the next notifying
+    of all services (see `get_pending_subscribers`).
 
     Parameters:
-    - db_name (str): The name of the SQLite database.
+    - connection (Connection): connection with opened transaction
+    - subscriber_id (int): ID of TG user
+    - raw_addresses (list[str]): addresses as they were entered by the user
 
     Returns:
     None
+    """
+    stored_addresses = connection.execute(
+        select(addresses_table.c.raw)
+        .where(addresses_table.c.subscriber_id == subscriber_id)
+        .order_by(addresses_table.c.id)
+    ).scalars()
+    if list(stored_addresses) == raw_addresses:
+        return
+
+    connection.execute(insert(subscribers_table).values(id=subscriber_id).on_conflict_do_nothing())
+    connection.execute(
+        delete(addresses_table).where(addresses_table.c.subscriber_id == subscriber_id)
+    )
+    if not raw_addresses:
+        return
+
+    addresses = []
+    for raw_address in raw_addresses:
+        address = Address.from_string(raw_address)
+        addresses.append(
+            {
+                "subscriber_id": subscriber_id,
+                "city": address.city,
+                "street": normalize_street(address.street),
+                "house": address.house,
+                "raw": raw_address,
+            }
+        )
+
+    connection.execute(insert(addresses_table), addresses)
+    connection.execute(
+        insert(pending_notifications_table).on_conflict_do_nothing(),
+        [
+            {"subscriber_id": subscriber_id, "city": city, "service": service}
+            for city in dict.fromkeys(address["city"] for address in addresses)
+            for service in SupportedService
+        ],
+    )
+
 
-    Example:
-    create_table('my_database.db')
-    """
-    conn = sqlite3.connect(db_name)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS data (
-            id INTEGER PRIMARY KEY,
-            created_at DATETIME,
-            parsed_text TEXT,
-            parsed_data TEXT
+def save_outages(
+    city: SupportedCity,
+    service: SupportedService,
+    schedule: "ScheduleIndex",
+    engine: Engine | None = None,
+) -> int:
+    """
+    Replaces stored outages of the city's service by the newly parsed schedule
+    (by single transaction with bulk insert).
+
+    Parameters:
+    - city (SupportedCity): city of the parsed schedule
+    - service (SupportedService): service of the parsed schedule
+    - schedule (ScheduleIndex): parsed schedule
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    count of stored outages
+    """
+    outages = [
+        {
+            "city": city,
+            "service": service,
+            "street": street,
+            "house_start": interval.start,
+            "house_end": interval.end,
+            "raw": interval.raw,
+            "start_time": date_range.start,
+            "end_time": date_range.end,
+        }
+        for schedule_city, street, interval, date_ranges in schedule.items()
+        if schedule_city == city
+        for date_range in date_ranges
+    ]
+    with (engine or get_engine()).begin() as connection:
+        connection.execute(
+            delete(outages_table).where(
+                outages_table.c.city == city, outages_table.c.service == service
+            )
         )
-    """)
-    conn.commit()
-    conn.close()
+        if outages:
+            connection.execute(insert(outages_table), outages)
+
+    return len(outages)
 
 
-def insert_data(db_name, raw_data, parsed_data):
+def save_outages_diff(
+    city: SupportedCity,
+    service: SupportedService,
+    diff: "ScheduleDiff",
+    fetched_at: datetime.datetime | None = None,
+    engine: Engine | None = None,
+) -> None:
     """
-    Inserts data into the specified SQLite database.
+    Applies the diff of the city's service schedule to stored outages: only removed and added
+    (including rescheduled) outages are written (by single transaction).
 
     Parameters:
-    - db_name (str): The name of the SQLite database.
-    - raw_data (any): The raw data to be inserted.
-    - parsed_data (any): The parsed data to be inserted.
+    - city (SupportedCity): city of the parsed schedule
+    - service (SupportedService): service of the parsed schedule
+    - diff (ScheduleDiff): diff between stored and newly parsed schedules (can be empty)
+    - fetched_at (datetime): time of the parsed schedule's data (it is stored if it's given)
+    - engine (Engine): engine of the DB (shared engine is used by default)
 
     Returns:
     None
+    """
+    removed = [
+        {
+            "b_street": outage.street,
+            "b_house_start": outage.house_start,
+            "b_house_end": outage.house_end,
+            "b_start_time": outage.date_range.start,
+            "b_end_time": outage.date_range.end,
+        }
+        for outage in diff.old_outages
+    ]
+    added = [
+        {
+            "city": city,
+            "service": service,
+            "street": outage.street,
+            "house_start": outage.house_start,
+            "house_end": outage.house_end,
+            "raw": outage.raw,
+            "start_time": outage.date_range.start,
+            "end_time": outage.date_range.end,
+        }
+        for outage in diff.new_outages
+    ]
+    with (engine or get_engine()).begin() as connection:
+        if removed:
+            query = delete(outages_table).where(
+                outages_table.c.city == city,
+                outages_table.c.service == service,
+                outages_table.c.street == bindparam("b_street"),
+                outages_table.c.house_start == bindparam("b_house_start"),
+                outages_table.c.house_end == bindparam("b_house_end"),
+                outages_table.c.start_time.is_not_distinct_from(bindparam("b_start_time")),
+                outages_table.c.end_time.is_not_distinct_from(bindparam("b_end_time")),
+            )
+            connection.execute(query, removed)
+
+        if added:
+            connection.execute(insert(outages_table), added)
+
+        if fetched_at is not None:
+            query = insert(schedules_table).values(
+                city=city, service=service, fetched_at=fetched_at
+            )
+            connection.execute(
+                query.on_conflict_do_update(
+                    index_elements=[schedules_table.c.city, schedules_table.c.service],
+                    set_={"fetched_at": query.excluded.fetched_at},
+                )
+            )
+
+
+def load_outages(
+    city: SupportedCity, service: SupportedService, engine: Engine | None = None
+) -> list[StoredOutage]:
+    """
+    Loads the last stored outages of the city's service (e.g. for diffing after restart).
+
+    Parameters:
+    - city (SupportedCity): city of the schedule
+    - service (SupportedService): service of the schedule
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    stored outages (see `src.parsing.diff.from_stored` for restoring the schedule)
+    """
+    query = select(
+        outages_table.c.street,
+        outages_table.c.house_start,
+        outages_table.c.house_end,
+        outages_table.c.raw,
+        outages_table.c.start_time,
+        outages_table.c.end_time,
+    ).where(outages_table.c.city == city, outages_table.c.service == service)
+    with (engine or get_engine()).connect() as connection:
+        return [
+            StoredOutage(street, house_start, house_end, raw, DateRange(start_time, end_time))
+            for street, house_start, house_end, raw, start_time, end_time in connection.execute(
+                query
+            )
+        ]
+
+
+def load_fetched_at(
+    city: SupportedCity, service: SupportedService, engine: Engine | None = None
+) -> datetime.datetime | None:
+    """
+    Loads the time of the stored outages' data of the city's service.
 
-    Example:
-    insert_data('my_database.db', raw_data, parsed_data)
-    """
-    conn = sqlite3.connect(db_name)
-    c = conn.cursor()
-    now = datetime.now()
-    c.execute(
-        """
-        INSERT INTO data (created_at, parsed_text, parsed_data) VALUES (?, ?, ?)
-    """,
-        (now, str(raw_data), str(parsed_data)),
+    Parameters:
+    - city (SupportedCity): city of the schedule
+    - service (SupportedService): service of the schedule
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    time of the data (None if the schedule isn't stored yet)
+    """
+    query = select(schedules_table.c.fetched_at).where(
+        schedules_table.c.city == city, schedules_table.c.service == service
     )
-    conn.commit()
-    conn.close()
+    with (engine or get_engine()).connect() as connection:
+        return connection.execute(query).scalar_one_or_none()
+
+
+def get_affected_subscribers(
+    service: SupportedService | None = None,
+    since: datetime.datetime | None = None,
+    engine: Engine | None = None,
+) -> list[AffectedSubscriber]:
+    """
+    Finds subscribers whose addresses are affected by stored (not finished yet) outages.
+    It is a single join by indexed columns: (city, street, house) -> (city, street, houses).
+
+    Parameters:
+    - service (SupportedService): filter by service (all services by default)
+    - since (datetime): outages which are finished before this time are ignored (default: now)
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    list of affected subscribers (one item per subscriber's address and outage)
+    """
+    since = since or datetime.datetime.now()
+    query = (
+        select(
+            addresses_table.c.subscriber_id,
+            outages_table.c.service,
+            addresses_table.c.raw,
+            outages_table.c.raw,
+            outages_table.c.start_time,
+            outages_table.c.end_time,
+        )
+        .join(
+            outages_table,
+            and_(
+                outages_table.c.city == addresses_table.c.city,
+                outages_table.c.street == addresses_table.c.street,
+                outages_table.c.house_start <= addresses_table.c.house,
+                outages_table.c.house_end >= addresses_table.c.house,
+            ),
+        )
+        .where(or_(outages_table.c.end_time.is_(None), outages_table.c.end_time > since))
+        .order_by(addresses_table.c.subscriber_id, outages_table.c.start_time)
+    )
+    if service:
+        query = query.where(outages_table.c.service == service)
+
+    with (engine or get_engine()).connect() as connection:
+        return [
+            AffectedSubscriber(
+                subscriber_id=subscriber_id,
+                service=SupportedService(outage_service),
+                address=address,
+                outage_address=outage_address,
+                start=start,
+                end=end,
+            )
+            for subscriber_id, outage_service, address, outage_address, start, end in (
+                connection.execute(query)
+            )
+        ]
+
+
+def get_subscribers_addresses(
+    city: SupportedCity | None = None,
+    streets: list[str] | None = None,
+    subscriber_ids: list[int] | None = None,
+    engine: Engine | None = None,
+) -> list[SubscriberAddress]:
+    """
+    Returns subscribers' addresses (streets are normalized).
+
+    Parameters:
+    - city (SupportedCity): addresses in the city only (all cities by default)
+    - streets (list[str]): addresses on the normalized streets only (all streets by default)
+    - subscriber_ids (list[int]): addresses of the subscribers only (all subscribers by default)
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    list of subscribers' addresses
+    """
+    query = select(
+        addresses_table.c.subscriber_id,
+        addresses_table.c.city,
+        addresses_table.c.street,
+        addresses_table.c.house,
+        addresses_table.c.raw,
+    )
+    if city is not None:
+        query = query.where(addresses_table.c.city == city)
+    if streets is not None:
+        query = query.where(addresses_table.c.street.in_(streets))
+    if subscriber_ids is not None:
+        query = query.where(addresses_table.c.subscriber_id.in_(subscriber_ids))
+
+    with (engine or get_engine()).connect() as connection:
+        return [
+            SubscriberAddress(
+                subscriber_id=subscriber_id,
+                city=SupportedCity(city),
+                street=street,
+                house=house,
+                raw=raw,
+            )
+            for subscriber_id, city, street, house, raw in connection.execute(query)
+        ]
+
+
+def get_sent_fingerprints(
+    subscriber_ids: list[int], engine: Engine | None = None
+) -> set[tuple[int, str]]:
+    """
+    Returns fingerprints of outages which are already sent to given subscribers.
+
+    Parameters:
+    - subscriber_ids (list[int]): IDs of subscribers
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    set of pairs: (subscriber_id, fingerprint)
+    """
+    query = select(
+        sent_notifications_table.c.subscriber_id, sent_notifications_table.c.fingerprint
+    ).where(sent_notifications_table.c.subscriber_id.in_(subscriber_ids))
+    with (engine or get_engine()).connect() as connection:
+        return {
+            (subscriber_id, fingerprint) for subscriber_id, fingerprint in connection.execute(query)
+        }
+
+
+def save_sent_notifications(
+    notifications: list[SentNotification], engine: Engine | None = None
+) -> None:
+    """
+    Stores fingerprints of sent outages (and removes ones for already finished outages).
+
+    Parameters:
+    - notifications (list[SentNotification]): sent outages
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    None
+    """
+    with (engine or get_engine()).begin() as connection:
+        connection.execute(
+            delete(sent_notifications_table).where(
+                sent_notifications_table.c.end_time < datetime.datetime.now()
+            )
+        )
+        if notifications:
+            connection.execute(
+                insert(sent_notifications_table).on_conflict_do_nothing(),
+                [notification._asdict() for notification in notifications],
+            )
+
+
+def get_pending_subscribers(
+    city: SupportedCity, service: SupportedService, engine: Engine | None = None
+) -> list[int]:
+    """
+    Returns subscribers whose whole schedule must be matched by notifying of the city's service
+    (their addresses are changed or sending to them has failed).
+
+    Parameters:
+    - city (SupportedCity): city of the schedule
+    - service (SupportedService): service of the schedule
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    IDs of pending subscribers
+    """
+    query = select(pending_notifications_table.c.subscriber_id).where(
+        pending_notifications_table.c.city == city,
+        pending_notifications_table.c.service == service,
+    )
+    with (engine or get_engine()).connect() as connection:
+        return list(connection.execute(query).scalars())
+
+
+def update_pending_subscribers(
+    city: SupportedCity,
+    service: SupportedService,
+    notified_ids: list[int],
+    failed_ids: list[int],
+    engine: Engine | None = None,
+) -> None:
+    """
+    Updates pending subscribers of the city's service after notifying (by single transaction).
+
+    Parameters:
+    - city (SupportedCity): city of the schedule
+    - service (SupportedService): service of the schedule
+    - notified_ids (list[int]): subscribers which aren't pending anymore
+    - failed_ids (list[int]): subscribers which couldn't be notified
+    - engine (Engine): engine of the DB (shared engine is used by default)
+
+    Returns:
+    None
+    """
+    with (engine or get_engine()).begin() as connection:
+        if notified_ids:
+            connection.execute(
+                delete(pending_notifications_table).where(
+                    pending_notifications_table.c.city == city,
+                    pending_notifications_table.c.service == service,
+                    pending_notifications_table.c.subscriber_id.in_(notified_ids),
+                )
+            )
+        if failed_ids:
+            connection.execute(
+                insert(pending_notifications_table).on_conflict_do_nothing(),
+                [
+                    {"subscriber_id": subscriber_id, "city": city, "service": service}
+                    for subscriber_id in failed_ids
+                ],
+            )
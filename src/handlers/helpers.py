@@ -2,10 +2,11 @@ from aiogram.enums import ParseMode
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
-from aiogram.utils.formatting import as_marked_section, as_key_value, Text, as_list
+from aiogram.utils.formatting import as_marked_section, Text, as_list
 
 from src.config.app import SERVICE_NAME_MAP
-from src.providers.shutdowns import ShutDownProvider, ShutDownByServiceInfo
+from src.providers.formatting import format_shutdowns
+from src.providers.shutdowns import ShutDownProvider
 
 
 class UserAddressStatesGroup(StatesGroup):
@@ -42,35 +43,13 @@ async def fetch_shutdowns(state: FSMContext) -> list[Text | str]:
     if not (addresses := await get_addresses(state)):
         return ["No address yet :("]
 
-    shutdowns_by_service: list[ShutDownByServiceInfo] = ShutDownProvider.for_addresses(addresses)
-    if not shutdowns_by_service:
-        return ["No shutdowns :)"]
-
-    result = []
-    for shutdown_by_service in shutdowns_by_service:
-        if not shutdown_by_service.shutdowns:
-            continue
-
-        title = SERVICE_NAME_MAP[shutdown_by_service.service]
-        values = []
-        for shutdown_info in shutdown_by_service.shutdowns:
-            values.append(
-                as_marked_section(
-                    shutdown_info.raw_address,
-                    as_key_value("Start", shutdown_info.start),
-                    as_key_value("End", shutdown_info.end),
-                    marker="   - ",
-                )
-            )
-        result.append(
-            as_marked_section(
-                title,
-                *values,
-                marker=" ⚠︎ ",
-            )
-        )
-
-    return result
+    lookup = await ShutDownProvider.for_addresses(addresses)
+    result = format_shutdowns(lookup.shutdowns)
+    # failed lookups must not look like "no shutdowns"
+    for service in dict.fromkeys(service for service, _ in lookup.failed):
+        result.append(f"Schedule of {SERVICE_NAME_MAP[service]} is unavailable, try later")
+
+    return result or ["No shutdowns :)"]
 
 
 async def get_addresses(state: FSMContext) -> list[str]:
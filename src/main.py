@@ -5,6 +5,7 @@ and provides a structured way for users to interact with address-related command
 """
 
 import asyncio
+import contextlib
 import logging
 import logging.config
 
@@ -13,9 +14,13 @@ from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 
 from src.db.storage import TGStorage
+from src.db.engine import dispose_engine
 from src.config.app import TG_BOT_API_TOKEN
 from src.config.logging import LOGGING_CONFIG
 from src.handlers.bot_handlers import form_router
+from src.parsing.http import get_http_client, close_http_client
+from src.providers.notifier import ShutDownNotifier
+from src.providers.scheduler import get_schedule_refresher
 
 
 async def main() -> None:
@@ -26,9 +31,24 @@ async def main() -> None:
     logging.captureWarnings(capture=True)
 
     bot = Bot(token=TG_BOT_API_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN))
-    dp = Dispatcher(storage=TGStorage())
+    storage = TGStorage()
+    dp = Dispatcher(storage=storage)
     dp.include_router(form_router)
-    await dp.start_polling(bot)
+    get_http_client()  # warm up shared connection pool for all parsers
+    refresher = get_schedule_refresher()
+    refresher.on_refresh.append(ShutDownNotifier(bot).notify)
+    refresher_task = asyncio.create_task(refresher.run())
+    try:
+        await dp.start_polling(bot)
+    finally:
+        refresher_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await refresher_task
+
+        await refresher.close()
+        await storage.close()
+        await close_http_client()
+        dispose_engine()
 
 
 if __name__ == "__main__":
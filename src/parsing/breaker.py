@@ -0,0 +1,78 @@
+"""Circuit breakers for upstream resources (failing upstream isn't requested for a while)"""
+
+import logging
+import time
+
+from src.config.app import CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT
+
+logger = logging.getLogger("parsing.breaker")
+
+
+class CircuitOpenError(Exception):
+    """Upstream resource isn't requested: its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive failures of the resource: after `failure_threshold` failures
+    the circuit is opened and requests are rejected immediately. After `reset_timeout`
+    seconds one trial request is allowed (half-open state): its success closes the circuit,
+    its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._is_half_open = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Checks if the resource can be requested now"""
+        if self.opened_at is None:
+            return True
+
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+
+        # the next trial is allowed after one more timeout (even if this one never finishes)
+        logger.info("Circuit %s is half-open: trying the resource again", self.name)
+        self.opened_at = time.monotonic()
+        self._is_half_open = True
+        return True
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Circuit %s is closed: the resource is available again", self.name)
+
+        self.failures = 0
+        self.opened_at = None
+        self._is_half_open = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._is_half_open or self.failures >= self.failure_threshold:
+            logger.warning("Circuit %s is open after %i failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+            self._is_half_open = False
+
+
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Returns the shared circuit breaker of the resource (it is created on the first call)"""
+    if (breaker := _circuit_breakers.get(name)) is None:
+        breaker = _circuit_breakers[name] = CircuitBreaker(name)
+
+    return breaker
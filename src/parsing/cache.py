@@ -0,0 +1,378 @@
+"""Two-tier (memory + disk) cache for fetched upstream pages"""
+
+import json
+import asyncio
+import itertools
+import hashlib
+import dataclasses
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Iterator
+
+from src.config.app import (
+    SupportedService,
+    CACHE_PATH,
+    CACHE_TTL,
+    CACHE_DEFAULT_TTL,
+    CACHE_MAX_SIZE,
+    CACHE_MEMORY_MAX_ITEMS,
+)
+
+logger = logging.getLogger("parsing.cache")
+
+
+@dataclasses.dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def dump(self) -> dict:
+        return dataclasses.asdict(self) | {"hits": self.hits}
+
+
+class CacheEntry(NamedTuple):
+    content: str
+    stored_at: float
+    content_hash: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def validators(self) -> dict[str, str]:
+        """Headers for conditional request (upstream responds 304 if the page isn't changed)"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Cache of fetched pages: in-memory (hot) LRU tier in front of the disk tier.
+    Each entry expires after TTL of its service, disk tier is limited by total size
+    (least recently used files are evicted first). Expired entries are kept on disk (until
+    eviction) with their validators (ETag, Last-Modified) for conditional requests.
+    Parsed (structured) results of pages are stored in the same disk tier (see `get_parsed`).
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        ttl: dict[SupportedService, int] | None = None,
+        default_ttl: int = CACHE_DEFAULT_TTL,
+        max_size: int = CACHE_MAX_SIZE,
+        memory_max_items: int = CACHE_MEMORY_MAX_ITEMS,
+    ) -> None:
+        self.path = path
+        self.ttl = CACHE_TTL if ttl is None else ttl
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self.memory_max_items = memory_max_items
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        # memory tier's hits don't touch files (their atime), they are taken into account by
+        # eviction instead, so the hottest pages aren't evicted from disk first
+        self._accessed_at: dict[Path, float] = {}
+        self._disk_size: int | None = None
+        # files are written and evicted by worker threads concurrently: the disk tier's size
+        # and eviction are guarded by the lock (re-entrant: writing removes the previous entry)
+        self._disk_lock = threading.RLock()
+        self.parsed_path = self.path / "parsed"
+        os.makedirs(self.parsed_path, exist_ok=True)
+
+    async def get(
+        self, service: SupportedService, key: str, ttl: int | None = None
+    ) -> CacheEntry | None:
+        """
+        Returns cached entry (if it exists and isn't expired yet)
+
+        Args:
+            service: service of the cached page (defines TTL)
+            key: unique key of the page (like hash of page's URL)
+            ttl: custom TTL of the page (service's TTL is used by default)
+
+        Returns:
+            cached entry or None
+        """
+        ttl = self.ttl_for(service) if ttl is None else ttl
+        if entry := self._memory.get(key):
+            if time.time() - entry.stored_at <= ttl:
+                self._memory.move_to_end(key)
+                self._accessed_at[self._file_path(service, key)] = time.time()
+                self.stats.memory_hits += 1
+                return entry
+
+            self._memory.pop(key, None)
+
+        entry = await asyncio.to_thread(self._read_file, self._file_path(service, key))
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        if time.time() - entry.stored_at > ttl:
+            logger.debug("Cache: expired entry %s_%s", service.lower(), key)
+            self.stats.expired += 1
+            return None
+
+        self.stats.disk_hits += 1
+        self._set_memory(key, entry)
+        return entry
+
+    async def get_stale(self, service: SupportedService, key: str) -> CacheEntry | None:
+        """Returns cached entry even if it's expired (e.g. for revalidation)"""
+        if entry := self._memory.get(key):
+            return entry
+
+        return await asyncio.to_thread(self._read_file, self._file_path(service, key))
+
+    async def set(
+        self,
+        service: SupportedService,
+        key: str,
+        content: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> CacheEntry:
+        """Stores content to both tiers (disk tier is cleaned up if it exceeds max size)"""
+        entry = CacheEntry(
+            content=content,
+            stored_at=time.time(),
+            content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            etag=etag,
+            last_modified=last_modified,
+        )
+        self._set_memory(key, entry)
+        file_path = self._file_path(service, key)
+        self.stats.evictions += await asyncio.to_thread(self._write_file, file_path, entry)
+        return entry
+
+    async def revalidate(self, service: SupportedService, key: str) -> CacheEntry | None:
+        """Marks stored entry as fresh again (upstream confirmed that it isn't modified)"""
+        if not (entry := await self.get_stale(service, key)):
+            return None
+
+        entry = entry._replace(stored_at=time.time())
+        self._set_memory(key, entry)
+        await asyncio.to_thread(self._touch_file, self._file_path(service, key), entry.stored_at)
+        return entry
+
+    async def get_parsed(self, key: str) -> dict | None:
+        """
+        Returns stored (serialized) parsing result of the page (parsed results don't expire:
+        they are keyed by page content's hash and are removed by eviction only)
+
+        Args:
+            key: unique key of the parsed page (like hash of page's content)
+
+        Returns:
+            deserialized data or None
+        """
+        return await asyncio.to_thread(self._read_parsed, self.parsed_path / f"{key}.json")
+
+    async def has_parsed(self, key: str) -> bool:
+        """Checks if parsing result of the page is stored already"""
+        return await asyncio.to_thread((self.parsed_path / f"{key}.json").exists)
+
+    async def set_parsed(self, key: str, data: dict) -> None:
+        """Stores parsing result of the page (data must be JSON-serializable)"""
+        file_path = self.parsed_path / f"{key}.json"
+        self.stats.evictions += await asyncio.to_thread(self._write_parsed, file_path, data)
+
+    async def invalidate(self, service: SupportedService, key: str) -> None:
+        """Drops the cached page from both tiers (next request will fetch it again)"""
+        self._memory.pop(key, None)
+        await asyncio.to_thread(self._remove_entry, self._file_path(service, key))
+
+    async def clear(self, service: SupportedService | None = None) -> None:
+        """Drops all cached pages (for the given service only if it's provided)"""
+        if service is None:
+            self._memory.clear()
+
+        removed_paths = await asyncio.to_thread(self._remove_all, service)
+        for file_path in removed_paths:
+            self._memory.pop(self._key_from_path(file_path), None)
+
+    def ttl_for(self, service: SupportedService) -> int:
+        return self.ttl.get(service, self.default_ttl)
+
+    def _file_path(self, service: SupportedService, key: str) -> Path:
+        return self.path / f"{service.lower()}_{key}.html"
+
+    @staticmethod
+    def _key_from_path(file_path: Path) -> str:
+        return file_path.stem.rsplit("_", maxsplit=1)[-1]
+
+    def _set_memory(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_items:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _meta_path(file_path: Path) -> Path:
+        return file_path.with_suffix(".json")
+
+    def _read_file(self, file_path: Path) -> CacheEntry | None:
+        try:
+            stat = file_path.stat()
+            content = file_path.read_text()
+        except FileNotFoundError:
+            return None
+
+        try:
+            meta = json.loads(self._meta_path(file_path).read_text())
+        except (FileNotFoundError, ValueError) as exc:
+            logger.warning("Cache: couldn't read metadata for %s: %r", file_path.name, exc)
+            meta = {}
+
+        # mtime: when content was stored, atime: when it was requested last time (for LRU)
+        self._touch_file(file_path, time.time(), stat.st_mtime)
+        return CacheEntry(
+            content=content,
+            stored_at=stat.st_mtime,
+            content_hash=(
+                meta.get("content_hash") or hashlib.sha256(content.encode("utf-8")).hexdigest()
+            ),
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+        )
+
+    def _write_file(self, file_path: Path, entry: CacheEntry) -> int:
+        meta = {
+            "content_hash": entry.content_hash,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        }
+        with self._disk_lock:
+            self._remove_entry(file_path)
+            disk_size = self._get_disk_size()
+            file_path.write_text(entry.content)
+            self._meta_path(file_path).write_text(json.dumps(meta))
+            self._disk_size = disk_size + file_path.stat().st_size
+            return self._evict() if self._disk_size > self.max_size else 0
+
+    def _read_parsed(self, file_path: Path) -> dict | None:
+        try:
+            stat = file_path.stat()
+            with open(file_path, "rt") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as exc:
+            logger.warning("Cache: couldn't read parsed data %s: %r", file_path.name, exc)
+            return None
+
+        self._touch_file(file_path, time.time(), stat.st_mtime)
+        return data
+
+    def _write_parsed(self, file_path: Path, data: dict) -> int:
+        with self._disk_lock:
+            self._remove_entry(file_path)
+            disk_size = self._get_disk_size()
+            with open(file_path, "wt") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+            self._disk_size = disk_size + file_path.stat().st_size
+            return self._evict() if self._disk_size > self.max_size else 0
+
+    def _remove_all(self, service: SupportedService | None) -> list[Path]:
+        """Removes service's pages (all pages and parsed results if service is None)"""
+        prefix = f"{service.lower()}_" if service else ""
+        file_paths = list(self.path.glob(f"{prefix}*.html"))
+        if service is None:
+            file_paths.extend(self.parsed_path.glob("*.json"))
+
+        with self._disk_lock:
+            for file_path in file_paths:
+                self._remove_entry(file_path)
+
+        return file_paths
+
+    @staticmethod
+    def _touch_file(file_path: Path, accessed_at: float, stored_at: float | None = None) -> None:
+        try:
+            os.utime(
+                file_path, times=(accessed_at, accessed_at if stored_at is None else stored_at)
+            )
+        except FileNotFoundError:
+            # the file is evicted (by another thread) meanwhile
+            pass
+
+    def _remove_entry(self, file_path: Path) -> None:
+        with self._disk_lock:
+            self._accessed_at.pop(file_path, None)
+            try:
+                size = file_path.stat().st_size
+                file_path.unlink()
+                if file_path.suffix == ".html":
+                    self._meta_path(file_path).unlink(missing_ok=True)
+            except FileNotFoundError:
+                return
+
+            if self._disk_size is not None:
+                self._disk_size -= size
+
+    def _get_disk_size(self) -> int:
+        with self._disk_lock:
+            if self._disk_size is None:
+                self._disk_size = sum(stat.st_size for _, stat in self._stat_disk_tier())
+
+            return self._disk_size
+
+    def _disk_tier_files(self) -> Iterator[Path]:
+        """Files which are counted in the disk tier's size: pages and parsed results"""
+        return itertools.chain(self.path.glob("*.html"), self.parsed_path.glob("*.json"))
+
+    def _stat_disk_tier(self) -> Iterator[tuple[Path, os.stat_result]]:
+        """Stats of the disk tier's files (files which are removed while scanning are skipped)"""
+        for file in self._disk_tier_files():
+            try:
+                yield file, file.stat()
+            except FileNotFoundError:
+                continue
+
+    def _evict(self) -> int:
+        """
+        Removes least recently used files until total size fits the limit
+        (it runs in a worker thread, so the count of evicted files is returned to the caller
+        instead of updating stats here)
+        """
+        with self._disk_lock:
+            files = sorted(
+                (max(stat.st_atime, self._accessed_at.get(file, 0.0)), file)
+                for file, stat in self._stat_disk_tier()
+            )
+            evicted_count = 0
+            for _, file_path in files:
+                if self._get_disk_size() <= self.max_size:
+                    break
+
+                logger.debug("Cache: evicting %s", file_path.name)
+                self._remove_entry(file_path)
+                evicted_count += 1
+
+            return evicted_count
+
+
+_page_cache: PageCache | None = None
+
+
+def get_page_cache() -> PageCache:
+    """Returns the app's shared page cache (it is created on the first call)"""
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = PageCache()
+
+    return _page_cache
@@ -0,0 +1,142 @@
+"""Diff between consecutive parsed schedules (so downstream work depends on the change only)"""
+
+import datetime
+import hashlib
+from typing import NamedTuple, Iterable, TYPE_CHECKING
+
+from src.config.app import SupportedCity
+from src.db.models import DateRange
+from src.parsing.index import ScheduleIndex
+
+if TYPE_CHECKING:
+    from src.db.utils import StoredOutage
+
+
+class Outage(NamedTuple):
+    """Single outage of the schedule: date range of the street's houses interval"""
+
+    city: SupportedCity
+    street: str  # normalized street
+    house_start: int
+    house_end: int
+    raw: str
+    date_range: DateRange
+
+    @property
+    def key(self) -> tuple[SupportedCity, str, int, int]:
+        return self.city, self.street, self.house_start, self.house_end
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable identity of the outage (it doesn't depend on raw address's formatting)"""
+        value = "|".join(map(str, (*self.key, self.date_range.start, self.date_range.end)))
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+class Rescheduled(NamedTuple):
+    old: Outage
+    new: Outage
+
+
+class ScheduleDiff(NamedTuple):
+    added: list[Outage]
+    removed: list[Outage]
+    rescheduled: list[Rescheduled]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.rescheduled)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.rescheduled)
+
+    @property
+    def new_outages(self) -> list[Outage]:
+        """Outages which appear in the new schedule only (added and rescheduled ones)"""
+        return self.added + [rescheduled.new for rescheduled in self.rescheduled]
+
+    @property
+    def old_outages(self) -> list[Outage]:
+        """Outages which are gone from the old schedule (removed and rescheduled ones)"""
+        return self.removed + [rescheduled.old for rescheduled in self.rescheduled]
+
+    def new_schedule(self) -> ScheduleIndex:
+        """Index of the new outages only (e.g. for matching them with subscribers)"""
+        return to_schedule(self.new_outages)
+
+
+def iter_outages(schedule: ScheduleIndex) -> Iterable[Outage]:
+    for city, street, interval, date_ranges in schedule.items():
+        for date_range in date_ranges:
+            yield Outage(city, street, interval.start, interval.end, interval.raw, date_range)
+
+
+def to_schedule(outages: Iterable[Outage]) -> ScheduleIndex:
+    schedule = ScheduleIndex()
+    for outage in outages:
+        schedule.add(
+            city=outage.city,
+            street=outage.street,
+            houses=(outage.house_start, outage.house_end),
+            raw=outage.raw,
+            date_range=outage.date_range,
+        )
+
+    return schedule
+
+
+def from_stored(city: SupportedCity, stored_outages: Iterable["StoredOutage"]) -> ScheduleIndex:
+    """Restores the schedule from stored outages (see `src.db.utils.load_outages`)"""
+    return to_schedule(Outage(city, *stored_outage) for stored_outage in stored_outages)
+
+
+def diff_schedules(old: ScheduleIndex | None, new: ScheduleIndex) -> ScheduleDiff:
+    """
+    Compares outages of two schedules by their fingerprints per (street, houses' interval):
+    outages which are removed from the interval and added to it are paired as rescheduled
+    (in order of their start), the rest ones are reported as removed / added.
+
+    :param old: previous schedule (all new outages are added if it is None)
+    :param new: current schedule
+    :return: diff of the schedules (unchanged outages aren't included)
+    """
+    old_outages = _group_by_key(iter_outages(old) if old is not None else ())
+    new_outages = _group_by_key(iter_outages(new))
+    diff = ScheduleDiff(added=[], removed=[], rescheduled=[])
+    for key in dict.fromkeys([*old_outages, *new_outages]):
+        old_by_fingerprint = old_outages.get(key, {})
+        new_by_fingerprint = new_outages.get(key, {})
+        removed = _sorted_by_start(
+            outage
+            for fingerprint, outage in old_by_fingerprint.items()
+            if fingerprint not in new_by_fingerprint
+        )
+        added = _sorted_by_start(
+            outage
+            for fingerprint, outage in new_by_fingerprint.items()
+            if fingerprint not in old_by_fingerprint
+        )
+        paired_count = min(len(removed), len(added))
+        diff.rescheduled.extend(map(Rescheduled, removed[:paired_count], added[:paired_count]))
+        diff.removed.extend(removed[paired_count:])
+        diff.added.extend(added[paired_count:])
+
+    return diff
+
+
+def _group_by_key(outages: Iterable[Outage]) -> dict[tuple, dict[str, Outage]]:
+    grouped: dict[tuple, dict[str, Outage]] = {}
+    for outage in outages:
+        grouped.setdefault(outage.key, {})[outage.fingerprint] = outage
+
+    return grouped
+
+
+def _sorted_by_start(outages: Iterable[Outage]) -> list[Outage]:
+    # unknown dates go last (DateRange can't be compared with each other directly)
+    return sorted(
+        outages,
+        key=lambda outage: (
+            outage.date_range.start or datetime.datetime.max,
+            outage.date_range.end or datetime.datetime.max,
+        ),
+    )
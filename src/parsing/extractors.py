@@ -0,0 +1,134 @@
+"""Extracting rows of the schedule's table from providers' HTML pages"""
+
+import re
+import functools
+import logging
+from typing import NamedTuple, Iterator, Callable
+
+from lxml import etree, html
+
+logger = logging.getLogger("parsing.extractors")
+
+# compiled once and reused for all rows / pages
+ROWS_XPATH = etree.XPath("//table/tbody/tr")
+ROW_STREETS_XPATH = etree.XPath(".//td[@class='rowStreets']")
+ROW_STREET_TEXTS_XPATH = etree.XPath(".//span/text()")
+ROW_CELL_TEXTS_XPATH = etree.XPath("td/text()")
+
+
+class RowData(NamedTuple):
+    """Raw data of the schedule's row"""
+
+    addresses: list[str]
+    dates: list[str]  # date_start, time_start, date_end, time_end
+
+
+class RowsLayout(NamedTuple):
+    """Layout of the provider's schedule table (row's XPaths are relative to the row)"""
+
+    rows: etree.XPath  # all rows of the whole page
+    streets: etree.XPath  # row's cell with streets
+    street_texts: etree.XPath  # streets' texts of the cell
+    cell_texts: etree.XPath  # texts of all row's cells
+    dates: slice  # date_start, time_start, date_end, time_end (positions in cells' texts)
+    # rows are extracted while streaming by their tag (only children of parent_tag are rows)
+    row_tag: str = "tr"
+    parent_tag: str = "tbody"
+
+
+ROSSETI_LAYOUT = RowsLayout(
+    rows=ROWS_XPATH,
+    streets=ROW_STREETS_XPATH,
+    street_texts=ROW_STREET_TEXTS_XPATH,
+    cell_texts=ROW_CELL_TEXTS_XPATH,
+    dates=slice(4, 8),
+)
+
+
+def extract_row(row: etree._Element, layout: RowsLayout = ROSSETI_LAYOUT) -> RowData | None:
+    """
+    Extracts raw data from the table's row
+
+    :param row: <tr> element of the schedule's table
+    :param layout: layout of the provider's table
+    :return: row's data or None (if the row doesn't contain streets)
+    """
+    if not (row_streets := layout.streets(row)):
+        return None
+
+    return RowData(
+        addresses=layout.street_texts(row_streets[0]),
+        dates=layout.cell_texts(row)[layout.dates],
+    )
+
+
+def iter_rows(html_content: str, layout: RowsLayout = ROSSETI_LAYOUT) -> Iterator[RowData]:
+    """Extracts rows from the whole page (builds full DOM of the page)"""
+    tree = html.fromstring(html_content)
+    for row in layout.rows(tree):
+        if row_data := extract_row(row, layout):
+            yield row_data
+
+
+def find_page_numbers(html_content: str, page_param: str) -> set[int]:
+    """
+    Finds numbers of pages which are linked by the page's pagination (links like "?PAGEN_1=2").
+    Links are searched in raw content, so the page's DOM isn't needed
+    """
+    return {int(number) for number in _page_link_pattern(page_param).findall(html_content)}
+
+
+@functools.lru_cache
+def _page_link_pattern(page_param: str) -> re.Pattern[str]:
+    # "&" is escaped in HTML attributes as "&amp;"
+    return re.compile(rf"[?&;]{re.escape(page_param)}=(\d+)")
+
+
+class StreamingRowsExtractor:
+    """
+    Incremental extractor: the page's content is fed by chunks (e.g. while it is being
+    downloaded), each row is extracted as soon as its <tr> element is closed and
+    then the element is freed, so the page's DOM is never kept in memory.
+    """
+
+    def __init__(
+        self, on_row: Callable[[RowData], None], layout: RowsLayout = ROSSETI_LAYOUT
+    ) -> None:
+        self.on_row = on_row
+        self.layout = layout
+        self.is_fed = False
+        self.rows_count = 0
+        self._parser = etree.HTMLPullParser(events=("end",), tag=layout.row_tag)
+
+    def feed(self, chunk: str) -> None:
+        """Feeds next chunk of the page's content and extracts all completed rows"""
+        self.is_fed = True
+        self._parser.feed(chunk)
+        self._read_rows()
+
+    def feed_content(self, html_content: str, chunk_size: int = 64 * 1024) -> None:
+        """Feeds the whole (already loaded) content by chunks and closes the extractor"""
+        for position in range(0, len(html_content), chunk_size):
+            self.feed(html_content[position : position + chunk_size])
+
+        self.close()
+
+    def close(self) -> None:
+        """Finishes parsing (rows which are closed by the end of document are extracted too)"""
+        if self.is_fed:
+            self._parser.close()
+            self._read_rows()
+
+    def _read_rows(self) -> None:
+        for _, row in self._parser.read_events():
+            parent = row.getparent()
+            if parent is not None and parent.tag == self.layout.parent_tag:
+                if row_data := extract_row(row, self.layout):
+                    self.rows_count += 1
+                    self.on_row(row_data)
+
+            # free processed element and all previous siblings (they are processed already)
+            row.clear(keep_tail=True)
+            if parent is not None:
+                while row.getprevious() is not None:
+                    del parent[0]
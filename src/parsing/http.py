@@ -0,0 +1,104 @@
+"""Shared (connection-pooled) HTTP client for fetching upstream resources"""
+
+import asyncio
+import logging
+import time
+import weakref
+
+import httpx
+
+from src.config.app import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_USE_HTTP2,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_REQUESTS_PER_SECOND,
+)
+
+logger = logging.getLogger("parsing.http")
+
+
+class RateLimiter:
+    """Spreads requests evenly: each next request waits for its own time slot"""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_http_client: httpx.AsyncClient | None = None
+_host_rate_limiters: dict[str, RateLimiter] = {}
+# semaphores are bound to the event loop, so they are kept per running loop
+_host_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+] = weakref.WeakKeyDictionary()
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Creates a new long-lived client with pool limits and timeouts from the app's config.
+    HTTP/2 is used only when it is enabled and the `h2` package is installed.
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    try:
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=HTTP_USE_HTTP2)
+    except ImportError as exc:
+        logger.warning("HTTP/2 isn't available (%r), falling back to HTTP/1.1", exc)
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the app's shared client (it is created on the first call)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Closes the shared client and releases all pooled connections"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_host_semaphore(url: str) -> asyncio.Semaphore:
+    """
+    Returns semaphore which limits simultaneous requests to the URL's host
+    (see HTTP_MAX_CONNECTIONS_PER_HOST), so concurrent fetching doesn't flood the upstream
+    """
+    loop_semaphores = _host_semaphores.setdefault(asyncio.get_running_loop(), {})
+    host = httpx.URL(url).host
+    if (semaphore := loop_semaphores.get(host)) is None:
+        semaphore = loop_semaphores[host] = asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+
+    return semaphore
+
+
+def get_host_rate_limiter(url: str) -> RateLimiter:
+    """Returns rate limiter of the URL's host (see HTTP_MAX_REQUESTS_PER_SECOND)"""
+    host = httpx.URL(url).host
+    if (rate_limiter := _host_rate_limiters.get(host)) is None:
+        rate_limiter = _host_rate_limiters[host] = RateLimiter(HTTP_MAX_REQUESTS_PER_SECOND)
+
+    return rate_limiter
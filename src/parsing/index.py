@@ -0,0 +1,180 @@
+"""Index of parsed schedule: allows to find date ranges for address without full scan"""
+
+import bisect
+import datetime
+from typing import NamedTuple, Iterator
+
+from src.config.app import SupportedCity
+from src.db.models import Address, DateRange
+from src.utils import normalize_street
+
+
+class HouseInterval(NamedTuple):
+    """Range of houses (both bounds are included) mentioned in the schedule's row"""
+
+    start: int
+    end: int
+    raw: str
+
+    def contains(self, house: int) -> bool:
+        return self.start <= house <= self.end
+
+
+class ScheduleIndex:
+    """
+    Parsed schedule stored as mapping: (city, normalized street) -> sorted house intervals.
+    Lookup of the address is a dict hit plus a binary search over street's intervals,
+    so wide house ranges (like "д.1-300") are stored as a single entry.
+    """
+
+    dump_version = 1
+
+    def __init__(self) -> None:
+        self._streets: dict[tuple[SupportedCity, str], dict[HouseInterval, set[DateRange]]] = {}
+        self._sorted: dict[tuple[SupportedCity, str], tuple[list[HouseInterval], list[int]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(intervals) for intervals in self._streets.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._streets)
+
+    def __repr__(self) -> str:
+        return f"<ScheduleIndex streets={len(self._streets)} intervals={len(self)}>"
+
+    def add(
+        self,
+        city: SupportedCity,
+        street: str,
+        houses: tuple[int, int],
+        raw: str,
+        date_range: DateRange,
+    ) -> None:
+        """
+        Adds the date range for given street and houses' interval
+
+        Args:
+            city: city of the address
+            street: street's name (as it was extracted from the raw address)
+            houses: first and last houses of the range (can be equal)
+            raw: raw address (as it was presented in the source)
+            date_range: found date range for the address
+        """
+        key = (city, normalize_street(street))
+        interval = HouseInterval(start=houses[0], end=houses[1], raw=raw)
+        self._streets.setdefault(key, {}).setdefault(interval, set()).add(date_range)
+        self._sorted.pop(key, None)
+
+    def update(self, other: "ScheduleIndex") -> None:
+        """Merges all entries of other index into this one (the other one isn't changed)"""
+        for key, intervals in other._streets.items():
+            street_intervals = self._streets.setdefault(key, {})
+            for interval, date_ranges in intervals.items():
+                street_intervals.setdefault(interval, set()).update(date_ranges)
+
+            self._sorted.pop(key, None)
+
+    def find(self, address: Address) -> dict[Address, set[DateRange]]:
+        """
+        Finds date ranges related to the given address
+
+        Args:
+            address: user's address
+
+        Returns:
+            dict with mapping: user-address (with raw address from the source) -> date ranges
+        """
+        if address.house is None:
+            return {}
+
+        key = (address.city, normalize_street(address.street))
+        if key not in self._streets:
+            return {}
+
+        intervals, max_ends = self._get_sorted(key)
+        date_ranges = self._streets[key]
+        found_ranges: dict[Address, set[DateRange]] = {}
+        # intervals are sorted by start: check only ones started before the house and
+        # stop as soon as none of the previous intervals can reach the house
+        position = bisect.bisect_right(intervals, address.house, key=lambda item: item.start)
+        for index in range(position - 1, -1, -1):
+            if max_ends[index] < address.house:
+                break
+
+            interval = intervals[index]
+            if interval.contains(address.house):
+                found_address = Address(
+                    city=address.city,
+                    street=address.street,
+                    house=address.house,
+                    raw=interval.raw,
+                )
+                found_ranges.setdefault(found_address, set()).update(date_ranges[interval])
+
+        return found_ranges
+
+    def items(self) -> Iterator[tuple[SupportedCity, str, HouseInterval, set[DateRange]]]:
+        """Iterates over all indexed entries: (city, normalized street, interval, date ranges)"""
+        for (city, street), intervals in self._streets.items():
+            for interval, date_ranges in intervals.items():
+                yield city, street, interval, date_ranges
+
+    def dump(self) -> dict:
+        """Compact JSON-serializable form of the index (see `load`)"""
+        streets = []
+        for (city, street), intervals in self._streets.items():
+            dumped_intervals = []
+            for interval, date_ranges in intervals.items():
+                dumped_ranges = [
+                    [self._dump_datetime(date_range.start), self._dump_datetime(date_range.end)]
+                    for date_range in date_ranges
+                ]
+                dumped_intervals.append([interval.start, interval.end, interval.raw, dumped_ranges])
+
+            streets.append([city, street, dumped_intervals])
+
+        return {"version": self.dump_version, "streets": streets}
+
+    @classmethod
+    def load(cls, data: dict) -> "ScheduleIndex":
+        """
+        Restores the index from its dumped form
+
+        Raises:
+            ValueError: if data was dumped by incompatible version of the index
+        """
+        if data.get("version") != cls.dump_version:
+            raise ValueError(f"Unsupported index dump version: {data.get('version')!r}")
+
+        index = cls()
+        for city, street, intervals in data["streets"]:
+            index._streets[(SupportedCity(city), street)] = {
+                HouseInterval(start=start, end=end, raw=raw): {
+                    DateRange(cls._load_datetime(start_dt), cls._load_datetime(end_dt))
+                    for start_dt, end_dt in date_ranges
+                }
+                for start, end, raw, date_ranges in intervals
+            }
+
+        return index
+
+    @staticmethod
+    def _dump_datetime(value: datetime.datetime | None) -> str | None:
+        return value.isoformat() if value else None
+
+    @staticmethod
+    def _load_datetime(value: str | None) -> datetime.datetime | None:
+        return datetime.datetime.fromisoformat(value) if value else None
+
+    def _get_sorted(self, key: tuple[SupportedCity, str]) -> tuple[list[HouseInterval], list[int]]:
+        """Returns street's intervals sorted by start and prefix maximums of their ends"""
+        if not (sorted_data := self._sorted.get(key)):
+            intervals = sorted(self._streets[key])
+            max_ends, max_end = [], 0
+            for interval in intervals:
+                max_end = max(max_end, interval.end)
+                max_ends.append(max_end)
+
+            sorted_data = self._sorted[key] = (intervals, max_ends)
+
+        return sorted_data
@@ -1,33 +1,110 @@
-import pprint
+import asyncio
 import hashlib
+import functools
 import logging
+import time
 import urllib.parse
-from collections import defaultdict
+from collections import OrderedDict
+from typing import NamedTuple
 from datetime import datetime, timedelta, date
 
 import httpx
-from lxml import html
 
 from src.db.models import Address, DateRange
-from src.utils import get_street_and_house, ADDRESS_DEFAULT_PATTERN
-from src.config.app import RESOURCE_URLS, SupportedCity, SupportedService, DATA_PATH
+from src.parsing.breaker import CircuitOpenError, get_circuit_breaker
+from src.parsing.http import get_http_client, get_host_semaphore, get_host_rate_limiter
+from src.parsing.cache import PageCache, CacheEntry, get_page_cache
+from src.parsing.index import ScheduleIndex
+from src.parsing.registry import Provider, get_provider
+from src.parsing.extractors import (
+    RowData,
+    StreamingRowsExtractor,
+    iter_rows,
+    find_page_numbers,
+)
+from src.utils import get_street_and_house
+from src.config.app import (
+    SupportedCity,
+    SupportedService,
+    CACHE_MEMORY_MAX_ITEMS,
+    PARSER_STREAMING,
+    PARSER_CHUNK_DAYS,
+    PARSER_CHUNK_MAX_TTL,
+    PARSER_PAGE_PARAM,
+    PARSER_MAX_PAGES,
+)
 
 logger = logging.getLogger("parsing.main")
+# per-row tracing: is enabled by PARSER_TRACE_LEVEL=DEBUG only (see src.config.logging)
+trace_logger = logging.getLogger("parsing.trace")
+
+
+class ParsedPage(NamedTuple):
+    schedule: ScheduleIndex
+    page_numbers: set[int]  # pages which are linked by the page's pagination
+    stored_at: float  # when the page's content was fetched (or revalidated)
+
+
+class ParsedSchedule(NamedTuple):
+    schedule: ScheduleIndex
+    stored_at: float  # time of the oldest page's content (pages are cached with their own TTLs)
+
+
+class PageBudget:
+    """Count of linked pages which can still be crawled (shared by all chunks of the parsing)"""
+
+    def __init__(self, pages: int) -> None:
+        self.left = pages
+
+    def take(self, count: int) -> int:
+        """Takes up to `count` pages from the budget, returns count of the taken ones"""
+        taken = min(count, max(self.left, 0))
+        self.left -= taken
+        return taken
 
 
 class Parser:
+    """
+    Shared pipeline of all providers (see src.parsing.registry): fetch -> extract rows ->
+    normalize addresses -> index. Providers plug their URLs and tables' layouts only,
+    caching, concurrency limits and circuit breaking are applied to all of them the same way.
+    """
+
     date_format = "%d.%m.%Y"
-    address_pattern = ADDRESS_DEFAULT_PATTERN
     max_days_filter = 90
+    # parsed pages: (city, service, parsing version, content's hash) -> parsing result
+    # (shared between instances)
+    _parsed_results: OrderedDict[
+        tuple[SupportedCity, SupportedService, str, str], ScheduleIndex
+    ] = OrderedDict()
+    parsed_results_max_items = CACHE_MEMORY_MAX_ITEMS
+    # streaming mode: rows are extracted incrementally (without building the whole page's DOM)
+    streaming = PARSER_STREAMING
+    stream_chunk_size = 64 * 1024
+    # the date range is fetched by chunks (0 - by single request): near-term chunks are
+    # re-fetched by service's cache TTL, far-future ones - less often (up to chunk_max_ttl)
+    chunk_days = PARSER_CHUNK_DAYS
+    chunk_max_ttl = PARSER_CHUNK_MAX_TTL
+    # paginated listings: linked pages are crawled concurrently (up to max_pages per parsing)
+    page_param = PARSER_PAGE_PARAM
+    max_pages = PARSER_MAX_PAGES
+    # single-flight: (URL's hash, refresh) -> in-flight fetching and parsing of the page
+    _in_flight: dict[tuple[str, bool], asyncio.Future[ParsedPage]] = {}
 
-    def __init__(self, city: SupportedCity) -> None:
-        self.urls = RESOURCE_URLS[city]
+    def __init__(
+        self,
+        city: SupportedCity,
+        http_client: httpx.AsyncClient | None = None,
+        cache: PageCache | None = None,
+    ) -> None:
+        self.http_client = http_client or get_http_client()
+        self.cache = cache or get_page_cache()
         self.city = city
         self.date_start = datetime.now().date()
         self.finish_time_filter = self.date_start + timedelta(days=self.max_days_filter)
 
-    def parse(
-        self, service: SupportedService, user_address: Address
+    async def parse(
+        self, service: SupportedService, user_address: Address, refresh: bool = False
     ) -> dict[Address, set[DateRange]]:
         """
         Allows to fetch shouting down info from supported service and format by requested address
@@ -36,113 +113,456 @@ class Parser:
         Args:
             service: requested Service
             user_address: current user's address
+            refresh: ignore cached page and fetch it again
 
         Returns:
             dict with mapping: user-address -> list of dates
         """
-        logger.debug(f"Parsing for service: {service} ({user_address})")
-        parsed_data = self._parse_website(service, user_address) or {}
+        logger.debug("Parsing for service: %s (%s)", service, user_address)
+        parsed_data = (await self._parse_website(service, user_address, refresh=refresh)).schedule
         logger.debug("Parsed data %s | \n%s", service, parsed_data)
+        return parsed_data.find(user_address)
+
+    async def parse_schedule(
+        self, service: SupportedService, refresh: bool = False
+    ) -> ScheduleIndex:
+        """
+        Fetches and parses the whole (not filtered by street) city's page for requested service.
+        The result can be used for answering many users' addresses via `ScheduleIndex.find`
 
-        found_ranges: dict[Address, set[DateRange]] = {}
-        for address, date_ranges in parsed_data.items():
-            if address.matches(user_address):
-                found_ranges[address] = date_ranges
+        Args:
+            service: requested Service
+            refresh: ignore cached page and fetch it again
+
+        Returns:
+            index of all found addresses and their date ranges
+        """
+        return (await self.fetch_schedule(service, refresh=refresh)).schedule
 
-        return found_ranges
+    async def fetch_schedule(
+        self, service: SupportedService, refresh: bool = False
+    ) -> ParsedSchedule:
+        """The same as `parse_schedule`, but the time of the schedule's data is returned too"""
+        logger.debug("Parsing schedule for service: %s (%s)", service, self.city)
+        return await self._parse_website(service, address=None, refresh=refresh)
 
-    def _get_content(self, service: SupportedService, address: Address) -> str:
-        url = self.urls[service].format(
-            city="",
-            street=urllib.parse.quote_plus(address.street.encode()) if address.street else "",
-            date_start=self._format_date(self.date_start),
-            date_finish=self._format_date(self.finish_time_filter),
+    def _get_provider(self, service: SupportedService) -> Provider:
+        return get_provider(self.city, service)
+
+    async def _get_content(
+        self,
+        service: SupportedService,
+        url: str,
+        cache_key: str,
+        refresh: bool = False,
+        extractor: StreamingRowsExtractor | None = None,
+        ttl: int | None = None,
+        conditional: bool = True,
+    ) -> CacheEntry:
+        """
+        Returns page's content from the cache or fetches it from upstream.
+        Expired pages are revalidated by conditional request (If-None-Match / If-Modified-Since),
+        so unchanged pages aren't downloaded again. If the stale page is evicted from the cache
+        while it is being revalidated, it is requested again without validators.
+        If extractor is provided, downloaded body is fed to it by chunks (while downloading),
+        but only if there is no earlier body of the page: otherwise the body is downloaded first,
+        so it isn't parsed again if it is byte-identical to the earlier one (see content's hash).
+        Failed requests are counted by the resource's circuit breaker: while it is open,
+        CircuitOpenError is raised without requesting the upstream.
+        """
+        if not refresh and (cached_entry := await self.cache.get(service, cache_key, ttl=ttl)):
+            return cached_entry
+
+        breaker = get_circuit_breaker(f"{self.city.lower()}_{service.lower()}")
+        if not breaker.allow():
+            raise CircuitOpenError(f"Upstream of {service} ({self.city}) is unavailable")
+
+        stale_entry = await self.cache.get_stale(service, cache_key) if conditional else None
+        headers = stale_entry.validators() if stale_entry else {}
+        if stale_entry is not None:
+            # the body is compared with the earlier one (by its hash) before parsing
+            extractor = None
+
+        logger.debug("Getting content for service: %s ...", url)
+        await get_host_rate_limiter(url).wait()
+        try:
+            async with (
+                get_host_semaphore(url),
+                self.http_client.stream("GET", url, headers=headers) as response,
+            ):
+                if response.status_code == httpx.codes.NOT_MODIFIED and stale_entry:
+                    logger.debug("Content isn't modified for service: %s", url)
+                    breaker.record_success()
+                    if revalidated_entry := await self.cache.revalidate(service, cache_key):
+                        return revalidated_entry
+
+                    is_evicted = True
+                else:
+                    is_evicted = False
+                    response.raise_for_status()
+                    chunks = []
+                    async for chunk in response.aiter_text():
+                        chunks.append(chunk)
+                        if extractor is not None:
+                            extractor.feed(chunk)
+        except httpx.HTTPError:
+            breaker.record_failure()
+            raise
+
+        if is_evicted:
+            logger.debug("Revalidated content is evicted, fetching it again: %s", url)
+            return await self._get_content(
+                service, url, cache_key, refresh=True, extractor=extractor, conditional=False
+            )
+
+        breaker.record_success()
+        return await self.cache.set(
+            service,
+            cache_key,
+            "".join(chunks),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
         )
-        tmp_file_path = (
-            DATA_PATH / f"{service.lower()}_{hashlib.sha256(url.encode("utf-8")).hexdigest()}.html"
+
+    def _get_url(
+        self, service: SupportedService, address: Address | None, window: tuple[date, date]
+    ) -> str:
+        street = address.street if address else None
+        return self._get_provider(service).url.format(
+            city="",
+            street=urllib.parse.quote_plus(street.encode()) if street else "",
+            date_start=self._format_date(window[0]),
+            date_finish=self._format_date(window[1]),
         )
-        if tmp_file_path.exists():
-            return tmp_file_path.read_text()
 
-        logger.debug("Getting content for service: %s ...", url)
-        with httpx.Client() as client:
-            response = client.get(url)
-            response_data = response.text
+    def _get_windows(self, chunked: bool = True) -> list[tuple[date, date]]:
+        """
+        Splits the requested date range into chunks. Chunks are aligned to the grid of
+        `chunk_days` (not to today), so URLs (and cache keys) of future chunks stay the same
+        for days and only the first chunk is shifted every day.
+        """
+        if not chunked or self.chunk_days <= 0:
+            return [(self.date_start, self.finish_time_filter)]
+
+        windows = []
+        window_start = self.date_start
+        while window_start <= self.finish_time_filter:
+            days_left = self.chunk_days - 1 - window_start.toordinal() % self.chunk_days
+            window_finish = min(window_start + timedelta(days=days_left), self.finish_time_filter)
+            windows.append((window_start, window_finish))
+            window_start = window_finish + timedelta(days=1)
+
+        return windows
+
+    def _get_window_ttl(self, service: SupportedService, window: tuple[date, date]) -> int:
+        """
+        Cache TTL of the chunk: the farther the chunk's start is from today, the less often
+        it is refreshed (service's TTL grows by one more TTL per `chunk_days` days ahead,
+        up to `chunk_max_ttl`)
+        """
+        ttl = self.cache.ttl_for(service)
+        if self.chunk_days <= 0:
+            return ttl
 
-        tmp_file_path.touch()
-        tmp_file_path.write_text(response_data)
-        return response_data
+        days_ahead = (window[0] - self.date_start).days
+        return max(ttl, min(int(ttl * (1 + days_ahead / self.chunk_days)), self.chunk_max_ttl))
 
-    def _parse_website(
+    async def _parse_website(
         self,
         service: SupportedService,
-        address: Address,
-    ) -> dict[Address, set[DateRange]]:
+        address: Address | None,
+        refresh: bool = False,
+    ) -> ParsedSchedule:
         """
-        Parses websites by URL's provided in params
+        Parses websites by URL's provided in params.
+        The date range is fetched by chunks (concurrently, each one is cached with its own TTL),
+        paginated chunks are crawled (up to `max_pages` linked pages of all chunks);
+        all parsed pages are merged into one index.
 
         :param service: provide site's address which should be parsed
-        :return: given data from website
+        :param address: filter by address's street (whole city's page will be parsed if None)
+        :param refresh: ignore cached pages and fetch them again
+        :return: index of found addresses (by street and houses' ranges) with date ranges
+            and time of the oldest page's content
         """
+        started_at = time.monotonic()
+        windows = self._get_windows(chunked=self._get_provider(service).is_dated)
+        budget = PageBudget(self.max_pages)
+        results = await asyncio.gather(
+            *(
+                self._parse_window(
+                    service,
+                    address,
+                    window,
+                    ttl=self._get_window_ttl(service, window),
+                    refresh=refresh,
+                    budget=budget,
+                )
+                for window in windows
+            )
+        )
+        result = self._merge([window_result.schedule for window_result in results])
+        logger.debug(
+            "Parsed %s (%s) in %.2fs: %i addresses",
+            service,
+            self.city,
+            time.monotonic() - started_at,
+            len(result),
+        )
+        return ParsedSchedule(result, min(window_result.stored_at for window_result in results))
 
-        html_content = self._get_content(service, address)
-        tree = html.fromstring(html_content)
-        rows = tree.xpath("//table/tbody/tr")
-        if not rows:
-            logger.info("No data found for service: %s", service)
-            return {}
+    async def _parse_window(
+        self,
+        service: SupportedService,
+        address: Address | None,
+        window: tuple[date, date],
+        ttl: int | None = None,
+        refresh: bool = False,
+        budget: PageBudget | None = None,
+    ) -> ParsedSchedule:
+        """
+        Parses all pages of the single date range's chunk: pages linked by the first page's
+        pagination are crawled concurrently (pages linked by them are crawled by the next round).
+        Linked pages are taken from the budget which is shared by all chunks of the parsing,
+        failed linked page is skipped (only its rows are missed), failed first page fails
+        the whole chunk.
+        """
+        budget = budget or PageBudget(self.max_pages)
+        url = self._get_url(service, address, window)
+        first_page = await self._parse_page(service, address, url, ttl=ttl, refresh=refresh)
+        results = [first_page.schedule]
+        stored_at = first_page.stored_at
+        crawled = {1}
+        page_numbers = first_page.page_numbers
+        while pages := sorted(page_numbers - crawled):
+            if (taken := budget.take(len(pages))) < len(pages):
+                logger.warning(
+                    "Too many pages, %i of them aren't crawled: %s", len(pages) - taken, url
+                )
+                if not (pages := pages[:taken]):
+                    break
 
-        result = defaultdict(set)
+            crawled.update(pages)
+            parsed_pages = await asyncio.gather(
+                *(
+                    self._parse_page(
+                        service, address, self._get_page_url(url, page), ttl=ttl, refresh=refresh
+                    )
+                    for page in pages
+                ),
+                return_exceptions=True,
+            )
+            page_numbers = set()
+            for page, parsed_page in zip(pages, parsed_pages):
+                if isinstance(parsed_page, Exception):
+                    logger.warning("Couldn't parse page %i of %s: %r", page, url, parsed_page)
+                    continue
 
-        for row in rows:
-            if row_streets := row.xpath(".//td[@class='rowStreets']"):
-                addresses = row_streets[0].xpath(".//span/text()")
-                dates = row.xpath("td/text()")[4:8]
-                date_start, time_start, date_end, time_end = map(self._clear_string, dates)
+                if isinstance(parsed_page, BaseException):
+                    raise parsed_page
 
-                if len(addresses) == 1:
-                    addresses = addresses[0]
-                else:
-                    logger.warning(
-                        "Streets count more than 1: %(service)s | %(address)s",
-                        {"service": service, "address": address},
-                    )
-                    addresses = ",".join(addresses)
-
-                start_time = self._prepare_time(date_start, time_start)
-                end_time = self._prepare_time(date_end, time_end)
-                for raw_address in addresses.split(","):
-                    raw_address = self._clear_string(raw_address)
-                    street_name, houses = get_street_and_house(
-                        pattern=self.address_pattern, address=raw_address
-                    )
-                    logger.debug(
-                        "Parsing [%(service)s] Found record: raw: "
-                        "%(raw_address)s | %(street_name)s | %(houses)s | %(start)s | %(end)s",
-                        {
-                            "service": service,
-                            "raw_address": raw_address,
-                            "street_name": street_name,
-                            "houses": houses,
-                            "start": start_time.isoformat() if start_time else "",
-                            "end": end_time.isoformat() if end_time else "",
-                        },
-                    )
-                    for house in houses:
-                        address_key = Address(
-                            city=self.city, street=street_name, house=house, raw=raw_address
-                        )
-                        result[address_key].add(DateRange(start_time, end_time))
-
-        pprint.pprint(result, indent=4)
-        print("======")
+                results.append(parsed_page.schedule)
+                page_numbers.update(parsed_page.page_numbers)
+                stored_at = min(stored_at, parsed_page.stored_at)
+
+        return ParsedSchedule(self._merge(results), stored_at)
+
+    def _get_page_url(self, url: str, page: int) -> str:
+        return f"{url}{'&' if '?' in url else '?'}{self.page_param}={page}"
+
+    @staticmethod
+    def _merge(results: list[ScheduleIndex]) -> ScheduleIndex:
+        if len(results) == 1:
+            return results[0]
+
+        # results can be shared (memoized), so they are merged into the new index
+        merged = ScheduleIndex()
+        for result in results:
+            merged.update(result)
+
+        return merged
+
+    async def _parse_page(
+        self,
+        service: SupportedService,
+        address: Address | None,
+        url: str,
+        ttl: int | None = None,
+        refresh: bool = False,
+    ) -> ParsedPage:
+        """
+        Parses the single page.
+        Concurrent calls for the same URL are coalesced: only the first one fetches and parses
+        the page, others await its result (single-flight).
+        """
+        cache_key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        flight_key = (cache_key, refresh)
+        if (in_flight := self._in_flight.get(flight_key)) is None:
+            in_flight = asyncio.ensure_future(
+                self._fetch_and_parse(service, address, url, cache_key, ttl=ttl, refresh=refresh)
+            )
+            self._in_flight[flight_key] = in_flight
+            in_flight.add_done_callback(functools.partial(self._finish_flight, flight_key))
+        else:
+            logger.debug("Joining in-flight request for service: %s (%s)", service, url)
+
+        # one caller's cancellation must not cancel fetching for the others
+        return await asyncio.shield(in_flight)
+
+    @classmethod
+    def _finish_flight(cls, flight_key: tuple[str, bool], in_flight: asyncio.Future) -> None:
+        if cls._in_flight.get(flight_key) is in_flight:
+            del cls._in_flight[flight_key]
+
+    async def _fetch_and_parse(
+        self,
+        service: SupportedService,
+        address: Address | None,
+        url: str,
+        cache_key: str,
+        ttl: int | None = None,
+        refresh: bool = False,
+    ) -> ParsedPage:
+        """Fetches the page (or gets it from the cache) and parses it (or reuses parsed result)"""
+        result = ScheduleIndex()
+        extractor = None
+        if self.streaming:
+            extractor = StreamingRowsExtractor(
+                on_row=functools.partial(self._add_row, result, service, address),
+                layout=self._get_provider(service).layout,
+            )
+
+        entry = await self._get_content(
+            service, url, cache_key, refresh=refresh, extractor=extractor, ttl=ttl
+        )
+        page_numbers = find_page_numbers(entry.content, self.page_param)
+        # parsed result depends on the provider's parsing rules too (not only on the content)
+        parsing_version = self._get_provider(service).parsing_version
+        parsed_key = (self.city, service, parsing_version, entry.content_hash)
+        stored_key = "_".join(
+            (self.city.lower(), service.lower(), parsing_version, entry.content_hash)
+        )
+        is_streamed = extractor is not None and extractor.is_fed
+        if is_streamed:
+            # the page has been parsed while it was downloading
+            extractor.close()
+
+        if (memo_result := self._parsed_results.get(parsed_key)) is not None:
+            logger.debug("Page's content isn't changed, reusing parsed result: %s", service)
+            self._parsed_results.move_to_end(parsed_key)
+            return ParsedPage(memo_result, page_numbers, entry.stored_at)
+
+        if is_streamed:
+            self._log_result(service, result)
+            if not await self.cache.has_parsed(stored_key):
+                await self.cache.set_parsed(stored_key, result.dump())
+
+        elif (result := await self._load_parsed(stored_key)) is None:
+            result = self._parse_content(service, address, entry.content)
+            await self.cache.set_parsed(stored_key, result.dump())
+
+        self._parsed_results[parsed_key] = result
+        while len(self._parsed_results) > self.parsed_results_max_items:
+            self._parsed_results.popitem(last=False)
+
+        return ParsedPage(result, page_numbers, entry.stored_at)
+
+    async def _load_parsed(self, stored_key: str) -> ScheduleIndex | None:
+        """Restores parsing result persisted with the page's cache (if it exists)"""
+        if (data := await self.cache.get_parsed(stored_key)) is None:
+            return None
+
+        try:
+            return ScheduleIndex.load(data)
+        except (ValueError, KeyError, TypeError) as exc:
+            logger.warning("Couldn't load parsed result %s: %r", stored_key, exc)
+            return None
+
+    def _parse_content(
+        self,
+        service: SupportedService,
+        address: Address | None,
+        html_content: str,
+    ) -> ScheduleIndex:
+        """Builds index of found addresses from the page's HTML content"""
+        result = ScheduleIndex()
+        layout = self._get_provider(service).layout
+        add_row = functools.partial(self._add_row, result, service, address)
+        if self.streaming:
+            StreamingRowsExtractor(on_row=add_row, layout=layout).feed_content(
+                html_content, chunk_size=self.stream_chunk_size
+            )
+        else:
+            for row_data in iter_rows(html_content, layout):
+                add_row(row_data)
+
+        self._log_result(service, result)
         return result
 
+    def _add_row(
+        self,
+        result: ScheduleIndex,
+        service: SupportedService,
+        address: Address | None,
+        row_data: RowData,
+    ) -> None:
+        """Adds found addresses (with their date range) from the schedule's row to the index"""
+        provider = self._get_provider(service)
+        addresses = row_data.addresses
+        date_start, time_start, date_end, time_end = map(self._clear_string, row_data.dates)
+
+        if len(addresses) == 1:
+            addresses = addresses[0]
+        else:
+            logger.warning(
+                "Streets count more than 1: %(service)s | %(address)s",
+                {"service": service, "address": address},
+            )
+            addresses = ",".join(addresses)
+
+        start_time = self._prepare_time(date_start, time_start, provider.datetime_format)
+        end_time = self._prepare_time(date_end, time_end, provider.datetime_format)
+        # all row's addresses share the same date range
+        date_range = DateRange(start_time, end_time)
+        for raw_address in addresses.split(","):
+            raw_address = self._clear_string(raw_address)
+            street_name, houses = get_street_and_house(
+                pattern=provider.address_pattern, address=raw_address
+            )
+            if trace_logger.isEnabledFor(logging.DEBUG):
+                trace_logger.debug(
+                    "Parsing [%(service)s] Found record: raw: "
+                    "%(raw_address)s | %(street_name)s | %(houses)s | %(start)s | %(end)s",
+                    {
+                        "service": service,
+                        "raw_address": raw_address,
+                        "street_name": street_name,
+                        "houses": houses,
+                        "start": start_time.isoformat() if start_time else "",
+                        "end": end_time.isoformat() if end_time else "",
+                    },
+                )
+            if houses:
+                result.add(
+                    city=self.city,
+                    street=street_name,
+                    houses=(houses.start, houses.stop - 1),
+                    raw=raw_address,
+                    date_range=date_range,
+                )
+
+    @staticmethod
+    def _log_result(service: SupportedService, result: ScheduleIndex) -> None:
+        if not result:
+            logger.info("No data found for service: %s", service)
+        else:
+            logger.debug("Parsed data for service: %s | %r", service, result)
+
     @staticmethod
     def _format_date(date: datetime | date) -> str:
         return date.strftime("%d.%m.%Y")
 
-    def _prepare_time(self, date: str, time: str) -> datetime | None:
+    def _prepare_time(self, date: str, time: str, datetime_format: str) -> datetime | None:
         date = self._clear_string(date)
         time = self._clear_string(time)
         if not (date and time):
@@ -150,7 +570,7 @@ class Parser:
             return None
 
         try:
-            result = datetime.strptime(f"{date}T{time}", "%d-%m-%YT%H:%M")
+            result = datetime.strptime(f"{date}T{time}", datetime_format)
         except ValueError:
             logger.warning("Incorrect date / time: date='%s' | time='%s'", date, time)
             return None
@@ -0,0 +1,99 @@
+"""Registry of upstream providers: (city, service) -> how the provider's pages are parsed"""
+
+import re
+import hashlib
+from typing import NamedTuple
+
+from src.config.app import RESOURCE_URLS, SupportedCity, SupportedService
+from src.parsing.extractors import RowsLayout, ROSSETI_LAYOUT
+from src.utils import ADDRESS_DEFAULT_PATTERN
+
+
+class UnknownProviderError(LookupError):
+    """There is no registered provider for the requested (city, service) pair"""
+
+
+class Provider(NamedTuple):
+    """
+    Upstream resource of the city's service. The provider describes its pages only
+    (URL and table's layout): fetching, caching, extracting, normalizing and indexing of rows
+    are shared by all providers (see `Parser`)
+    """
+
+    city: SupportedCity
+    service: SupportedService
+    # template with (optional) placeholders: {city}, {street}, {date_start}, {date_finish}
+    url: str
+    layout: RowsLayout = ROSSETI_LAYOUT
+    address_pattern: re.Pattern[str] = ADDRESS_DEFAULT_PATTERN
+    datetime_format: str = "%d-%m-%YT%H:%M"
+
+    @property
+    def key(self) -> tuple[SupportedCity, SupportedService]:
+        return self.city, self.service
+
+    @property
+    def parsing_version(self) -> str:
+        """
+        Token of the provider's parsing rules: parsed results depend on them (not only on
+        page's content), so the token is a part of their keys
+        """
+        layout = self.layout
+        rules = (
+            self.service,
+            layout.rows.path,
+            layout.streets.path,
+            layout.street_texts.path,
+            layout.cell_texts.path,
+            layout.dates,
+            layout.row_tag,
+            layout.parent_tag,
+            self.address_pattern.pattern,
+            self.datetime_format,
+        )
+        return hashlib.sha1(repr(rules).encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def is_dated(self) -> bool:
+        """The page can be requested by date range (so it can be fetched by chunks)"""
+        return "{date_start}" in self.url
+
+
+_providers: dict[tuple[SupportedCity, SupportedService], Provider] = {}
+
+
+def register_provider(provider: Provider) -> Provider:
+    """Registers (or replaces) the provider of its (city, service) pair"""
+    _providers[provider.key] = provider
+    return provider
+
+
+def get_provider(city: SupportedCity, service: SupportedService) -> Provider:
+    if (provider := _providers.get((city, service))) is None:
+        raise UnknownProviderError(f"There is no provider of {service} ({city})")
+
+    return provider
+
+
+def get_providers() -> list[Provider]:
+    return list(_providers.values())
+
+
+def get_services(city: SupportedCity | None = None) -> list[SupportedService]:
+    """Returns services (in the enum's order) which have providers (in the city, if it is given)"""
+    services = {
+        service for provider_city, service in _providers if city is None or provider_city == city
+    }
+    return [service for service in SupportedService if service in services]
+
+
+# GPTEK (hot water) and Vodokanal (cold water) pages (see RESOURCE_URLS) are registered
+# the same way as soon as their tables' layouts are described
+register_provider(
+    Provider(
+        city=SupportedCity.SPB,
+        service=SupportedService.ELECTRICITY,
+        url=RESOURCE_URLS[SupportedCity.SPB][SupportedService.ELECTRICITY],
+        layout=ROSSETI_LAYOUT,
+    )
+)
@@ -0,0 +1,45 @@
+"""Formatting of found shutdowns for messages (shared by handlers and notifications)"""
+
+from aiogram.utils.formatting import as_marked_section, as_key_value, Text
+
+from src.config.app import SERVICE_NAME_MAP
+from src.providers.shutdowns import ShutDownByServiceInfo
+
+
+def format_shutdowns(shutdowns_by_service: list[ShutDownByServiceInfo]) -> list[Text | str]:
+    """
+    Formats found shutdowns as marked sections (one section per service).
+    Shutdowns from stale schedule are marked by the time of their last update.
+
+    Args:
+        shutdowns_by_service: found shutdowns grouped by service
+
+    """
+    result = []
+    for shutdown_by_service in shutdowns_by_service:
+        if not shutdown_by_service.shutdowns:
+            continue
+
+        title = SERVICE_NAME_MAP[shutdown_by_service.service]
+        if stale_since := shutdown_by_service.stale_since:
+            title = f"{title} (not updated since {stale_since:%d.%m.%Y %H:%M})"
+
+        values = []
+        for shutdown_info in shutdown_by_service.shutdowns:
+            values.append(
+                as_marked_section(
+                    shutdown_info.raw_address,
+                    as_key_value("Start", shutdown_info.start),
+                    as_key_value("End", shutdown_info.end),
+                    marker="   - ",
+                )
+            )
+        result.append(
+            as_marked_section(
+                title,
+                *values,
+                marker=" ⚠︎ ",
+            )
+        )
+
+    return result
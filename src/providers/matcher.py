@@ -0,0 +1,132 @@
+"""Batch matching of all subscribers' addresses against the parsed schedule"""
+
+import bisect
+import datetime
+import math
+from array import array
+from typing import NamedTuple, Iterator
+
+from src.config.app import SupportedCity
+from src.db.models import DateRange
+from src.db.utils import SubscriberAddress
+from src.parsing.index import ScheduleIndex
+
+# street's id is kept in high bits of the key, house number in low ones
+HOUSE_BITS = 32
+
+
+class OutageMatch(NamedTuple):
+    subscriber: SubscriberAddress
+    raw: str  # outage's raw address (as it was presented in the source)
+    date_range: DateRange
+
+
+class OutageColumns(NamedTuple):
+    """Parsed outages encoded as columns (one item per outage's date range)"""
+
+    key_start: array  # street's id + first house
+    key_end: array  # street's id + last house
+    end_time: array  # epoch seconds (infinity if the outage's end is unknown)
+    raws: list[str]
+    date_ranges: list[DateRange]
+
+
+class ScheduleMatcher:
+    """
+    Subscribers' addresses are encoded once as sorted column of integer keys:
+    (interned street's id << HOUSE_BITS) | house. Every outage is encoded the same way as pair of
+    keys (street + first house, street + last house), so all subscribers covered by the outage
+    are a contiguous slice of the column: the join is two binary searches per outage
+    (no per-subscriber loops), filtering by time is done over epoch column.
+    """
+
+    def __init__(self, addresses: list[SubscriberAddress]) -> None:
+        self._street_ids: dict[tuple[SupportedCity, str], int] = {}
+        encoded = sorted(
+            (self._key(self._intern(address.city, address.street), address.house), position)
+            for position, address in enumerate(addresses)
+            if address.house is not None and 0 <= address.house < 1 << HOUSE_BITS
+        )
+        self._keys = array("q", (key for key, _ in encoded))
+        self._addresses = [addresses[position] for _, position in encoded]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def encode(self, city: SupportedCity, schedule: ScheduleIndex) -> OutageColumns:
+        """Encodes outages of the schedule (outages on streets without subscribers are skipped)"""
+        columns = OutageColumns(array("q"), array("q"), array("d"), [], [])
+        for schedule_city, street, interval, date_ranges in schedule.items():
+            street_id = self._street_ids.get((schedule_city, street))
+            if schedule_city != city or street_id is None:
+                continue
+
+            key_start = self._key(street_id, max(interval.start, 0))
+            key_end = self._key(street_id, min(interval.end, (1 << HOUSE_BITS) - 1))
+            for date_range in date_ranges:
+                columns.key_start.append(key_start)
+                columns.key_end.append(key_end)
+                columns.end_time.append(date_range.end.timestamp() if date_range.end else math.inf)
+                columns.raws.append(interval.raw)
+                columns.date_ranges.append(date_range)
+
+        return columns
+
+    def join(
+        self, columns: OutageColumns, since: datetime.datetime | None = None
+    ) -> list[tuple[int, int, int]]:
+        """
+        Joins encoded outages with subscribers' column
+
+        Args:
+            columns: encoded outages (see `encode`)
+            since: outages which are finished before this time are skipped (default: now)
+
+        Returns:
+            list of (outage's position, first and last + 1 subscribers' positions)
+        """
+        since_time = (since or datetime.datetime.now()).timestamp()
+        keys = self._keys
+        result = []
+        for position, (key_start, key_end, end_time) in enumerate(
+            zip(columns.key_start, columns.key_end, columns.end_time)
+        ):
+            if end_time < since_time:
+                continue
+
+            start = bisect.bisect_left(keys, key_start)
+            end = bisect.bisect_right(keys, key_end, lo=start)
+            if start < end:
+                result.append((position, start, end))
+
+        return result
+
+    def match(
+        self,
+        city: SupportedCity,
+        schedule: ScheduleIndex,
+        since: datetime.datetime | None = None,
+    ) -> Iterator[OutageMatch]:
+        """
+        Finds all (subscriber's address, outage) pairs
+
+        Args:
+            city: city of the schedule
+            schedule: parsed schedule
+            since: outages which are finished before this time are skipped (default: now)
+
+        Returns:
+            iterator over found pairs
+        """
+        columns = self.encode(city, schedule)
+        for position, start, end in self.join(columns, since=since):
+            raw, date_range = columns.raws[position], columns.date_ranges[position]
+            for address in self._addresses[start:end]:
+                yield OutageMatch(address, raw, date_range)
+
+    def _intern(self, city: SupportedCity, street: str) -> int:
+        return self._street_ids.setdefault((city, street), len(self._street_ids))
+
+    @staticmethod
+    def _key(street_id: int, house: int) -> int:
+        return street_id << HOUSE_BITS | house
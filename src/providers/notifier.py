@@ -0,0 +1,170 @@
+"""Background notifications about new (or rescheduled) outages for subscribers"""
+
+import asyncio
+import hashlib
+import logging
+import datetime
+from collections import defaultdict
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.utils.formatting import as_list
+
+from src.config.app import SupportedCity, SupportedService
+from src.db.models import DateRange
+from src.db.utils import (
+    SentNotification,
+    SubscriberAddress,
+    get_subscribers_addresses,
+    get_sent_fingerprints,
+    get_pending_subscribers,
+    save_sent_notifications,
+    update_pending_subscribers,
+)
+from src.parsing.diff import ScheduleDiff
+from src.parsing.index import ScheduleIndex
+from src.providers.formatting import format_shutdowns
+from src.providers.matcher import ScheduleMatcher
+from src.providers.shutdowns import ShutDownInfo, ShutDownByServiceInfo
+
+logger = logging.getLogger(__name__)
+
+
+class ShutDownNotifier:
+    """
+    Pushes new outages to affected subscribers: it is called for each refreshed schedule
+    (see `ScheduleRefresher.on_refresh`), so only outages of the schedule's diff are matched with
+    subscribers' addresses on the changed streets (by single batch join, no per-user fetching is
+    needed). The whole schedule is matched for pending subscribers only: ones whose addresses are
+    changed or whose notifying has failed (see `get_pending_subscribers`). Already sent outages
+    (by their fingerprints) are skipped.
+    """
+
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+
+    async def notify(
+        self,
+        city: SupportedCity,
+        service: SupportedService,
+        schedule: ScheduleIndex,
+        diff: ScheduleDiff | None = None,
+    ) -> int:
+        """
+        Sends new outages of the parsed schedule to affected subscribers
+
+        Args:
+            city: city of the parsed schedule
+            service: service of the parsed schedule
+            schedule: parsed schedule
+            diff: changes since the previous schedule (whole schedule is matched for all
+                subscribers if it isn't given)
+
+        Returns:
+            count of notified subscribers
+        """
+        found: dict[int, dict[str, ShutDownInfo]] = defaultdict(dict)
+        pending_ids = await asyncio.to_thread(get_pending_subscribers, city, service)
+        if diff is None:
+            addresses = await asyncio.to_thread(get_subscribers_addresses, city)
+            self._match(found, city, service, schedule, addresses)
+        else:
+            if diff:
+                new_schedule = diff.new_schedule()
+                streets = list(dict.fromkeys(street for _, street, _, _ in new_schedule.items()))
+                addresses = await asyncio.to_thread(
+                    get_subscribers_addresses, city, streets=streets
+                )
+                self._match(found, city, service, new_schedule, addresses)
+
+            if pending_ids:
+                addresses = await asyncio.to_thread(
+                    get_subscribers_addresses, city, subscriber_ids=pending_ids
+                )
+                self._match(found, city, service, schedule, addresses)
+
+        sent_notifications: list[SentNotification] = []
+        failed_ids: list[int] = []
+        if found:
+            sent_fingerprints = await asyncio.to_thread(get_sent_fingerprints, list(found))
+            for subscriber_id, shutdowns in found.items():
+                new_shutdowns = {
+                    fingerprint: shutdown
+                    for fingerprint, shutdown in shutdowns.items()
+                    if (subscriber_id, fingerprint) not in sent_fingerprints
+                }
+                if not new_shutdowns:
+                    continue
+
+                if await self._send(subscriber_id, service, new_shutdowns.values()):
+                    sent_notifications.extend(
+                        SentNotification(subscriber_id, fingerprint, shutdown.end)
+                        for fingerprint, shutdown in new_shutdowns.items()
+                    )
+                else:
+                    failed_ids.append(subscriber_id)
+
+            await asyncio.to_thread(save_sent_notifications, sent_notifications)
+
+        if pending_ids or failed_ids:
+            # failed subscribers are pending (their whole schedule is matched next time)
+            await asyncio.to_thread(
+                update_pending_subscribers,
+                city,
+                service,
+                [subscriber_id for subscriber_id in pending_ids if subscriber_id not in failed_ids],
+                failed_ids,
+            )
+
+        notified_count = len({notification.subscriber_id for notification in sent_notifications})
+        if notified_count:
+            logger.info(
+                "Notified %i subscribers about %s outages (%s)", notified_count, service, city
+            )
+        return notified_count
+
+    def _match(
+        self,
+        found: dict[int, dict[str, ShutDownInfo]],
+        city: SupportedCity,
+        service: SupportedService,
+        schedule: ScheduleIndex,
+        addresses: list[SubscriberAddress],
+    ) -> None:
+        """Adds outages of the schedule which affect given addresses to found ones"""
+        for match in ScheduleMatcher(addresses).match(city, schedule):
+            fingerprint = self._fingerprint(service, match.raw, match.date_range)
+            found[match.subscriber.subscriber_id][fingerprint] = ShutDownInfo(
+                start=match.date_range.start,
+                end=match.date_range.end,
+                raw_address=match.raw,
+                city=city,
+            )
+
+    async def _send(
+        self, subscriber_id: int, service: SupportedService, shutdowns: Iterable[ShutDownInfo]
+    ) -> bool:
+        shutdowns = sorted(shutdowns, key=lambda shutdown: shutdown.start or datetime.datetime.min)
+        content = as_list(
+            "New shutdowns for your addresses:",
+            *format_shutdowns([ShutDownByServiceInfo(service=service, shutdowns=shutdowns)]),
+            sep="\n\n",
+        )
+        try:
+            await self.bot.send_message(chat_id=subscriber_id, **content.as_kwargs())
+        except TelegramRetryAfter as exc:
+            logger.warning("Too many requests, retry after %is", exc.retry_after)
+            await asyncio.sleep(exc.retry_after)
+            return await self._send(subscriber_id, service, shutdowns)
+        except TelegramAPIError as exc:
+            logger.warning("Couldn't notify subscriber %s: %r", subscriber_id, exc)
+            return False
+
+        return True
+
+    @staticmethod
+    def _fingerprint(service: SupportedService, raw_address: str, date_range: DateRange) -> str:
+        """Stable identity of the outage: rescheduled outage gets new fingerprint"""
+        value = f"{service}|{raw_address}|{date_range.start}|{date_range.end}"
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()
@@ -0,0 +1,295 @@
+"""Background refreshing of parsed schedules (handlers answer from in-memory snapshots)"""
+
+import asyncio
+import datetime
+import logging
+import random
+import time
+from typing import NamedTuple, Callable, Awaitable
+
+from src.config.app import (
+    SupportedCity,
+    SupportedService,
+    SCHEDULE_REFRESH_INTERVAL,
+    SCHEDULE_REFRESH_JITTER,
+    SCHEDULE_CALLBACKS_SHUTDOWN_TIMEOUT,
+)
+from src.db.utils import save_outages_diff, load_outages, load_fetched_at
+from src.parsing.diff import ScheduleDiff, diff_schedules, from_stored
+from src.parsing.index import ScheduleIndex
+from src.parsing.main_parsing import Parser
+from src.parsing.registry import get_providers
+
+logger = logging.getLogger(__name__)
+RefreshCallback = Callable[
+    [SupportedCity, SupportedService, ScheduleIndex, ScheduleDiff], Awaitable
+]
+
+
+class ScheduleSnapshot(NamedTuple):
+    """The newest parsed schedule of the city's service"""
+
+    schedule: ScheduleIndex
+    refreshed_at: float
+    fetched_at: float  # time of the schedule's data (its oldest page)
+    diff: ScheduleDiff  # changes since the previous snapshot
+    # restored from the DB after restart: it is stale until the first successful refreshing
+    is_restored: bool = False
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.refreshed_at
+
+
+class ScheduleRefresher:
+    """
+    Periodically fetches and parses schedules of all supported (city, service) pairs and keeps
+    the newest ones in memory, so users' requests don't wait for the upstream site.
+    Each refreshed schedule is compared with the previous one: only the diff is written to the DB.
+    Registered callbacks (e.g. for notifying subscribers) get the schedule and its diff after each
+    refreshing (even if nothing is changed, e.g. for retrying). Callbacks are run by a detached
+    task (one at a time per schedule), so the refreshing (and users' requests which await it)
+    doesn't wait for them.
+    After restart, the previous schedule is loaded from the DB: it is served as stale snapshot
+    (with the time of its data) until the first successful refreshing, so users' requests
+    are answered even if the upstream is down.
+    Pages are fetched again by refreshing only when their cached copies expire (far-future chunks
+    live longer, see `Parser._get_window_ttl`), so the time of the snapshot's data is the time
+    of its oldest page (`fetched_at`), not the time of the refreshing.
+    Stale-while-revalidate: snapshot which is older than `stale_after` seconds (the last
+    refreshing has failed, e.g. the upstream is down) is still returned immediately,
+    its refreshing is started in the background.
+    """
+
+    def __init__(
+        self,
+        interval: float = SCHEDULE_REFRESH_INTERVAL,
+        jitter: float = SCHEDULE_REFRESH_JITTER,
+    ) -> None:
+        self.interval = interval
+        self.jitter = jitter
+        # the next snapshot is ready after the interval, jitter and duration of refreshing
+        # (chunked and crawled pages take a while), so it is stale only after a missed cycle
+        self.stale_after = 2 * interval + jitter
+        self.on_refresh: list[RefreshCallback] = []
+        self._snapshots: dict[tuple[SupportedCity, SupportedService], ScheduleSnapshot] = {}
+        # the last schedules which are stored to the DB (base for the next diffs)
+        self._stored: dict[tuple[SupportedCity, SupportedService], ScheduleIndex] = {}
+        self._refreshing: dict[
+            tuple[SupportedCity, SupportedService], asyncio.Future[ScheduleSnapshot]
+        ] = {}
+        self._callbacks: dict[tuple[SupportedCity, SupportedService], asyncio.Task] = {}
+
+    def get(self, city: SupportedCity, service: SupportedService) -> ScheduleSnapshot | None:
+        """Returns the newest snapshot (None if the schedule isn't refreshed yet)"""
+        return self._snapshots.get((city, service))
+
+    async def get_or_refresh(
+        self, city: SupportedCity, service: SupportedService
+    ) -> ScheduleSnapshot:
+        """
+        Returns the newest snapshot: it is restored from the DB (or refreshed, if it isn't stored)
+        first if it doesn't exist yet, stale one is returned as is (and refreshed in the background)
+        """
+        if (snapshot := self.get(city, service)) is None and (
+            snapshot := await self._restore(city, service)
+        ) is None:
+            return await self.refresh(city, service)
+
+        if self.is_stale(snapshot):
+            logger.debug("Serving stale %s (%s): %.0fs old", service, city, snapshot.age)
+            self._start_refresh(city, service).add_done_callback(self._log_refresh_error)
+
+        return snapshot
+
+    def is_stale(self, snapshot: ScheduleSnapshot) -> bool:
+        return snapshot.is_restored or snapshot.age > self.stale_after
+
+    async def _restore(
+        self, city: SupportedCity, service: SupportedService
+    ) -> ScheduleSnapshot | None:
+        """Restores the snapshot from the stored schedule (None if it isn't stored yet)"""
+        key = (city, service)
+        if (fetched_at := await asyncio.to_thread(load_fetched_at, city, service)) is None:
+            return None
+
+        schedule = from_stored(city, await asyncio.to_thread(load_outages, city, service))
+        if (snapshot := self.get(city, service)) is not None:
+            return snapshot  # it is refreshed (or restored) meanwhile
+
+        logger.info("Restored %s (%s) from the DB: data of %s", service, city, fetched_at)
+        snapshot = ScheduleSnapshot(
+            schedule=schedule,
+            refreshed_at=fetched_at.timestamp(),
+            fetched_at=fetched_at.timestamp(),
+            diff=ScheduleDiff(added=[], removed=[], rescheduled=[]),
+            is_restored=True,
+        )
+        self._snapshots[key] = snapshot
+        self._stored.setdefault(key, schedule)
+        return snapshot
+
+    async def refresh(self, city: SupportedCity, service: SupportedService) -> ScheduleSnapshot:
+        """
+        Fetches and parses the city's schedule and replaces its snapshot
+        (concurrent calls for the same schedule await the same refreshing)
+
+        Args:
+            city: city of the schedule
+            service: service of the schedule
+
+        Returns:
+            new snapshot
+        """
+        return await asyncio.shield(self._start_refresh(city, service))
+
+    def _start_refresh(
+        self, city: SupportedCity, service: SupportedService
+    ) -> asyncio.Future[ScheduleSnapshot]:
+        key = (city, service)
+        if (refreshing := self._refreshing.get(key)) is None:
+            refreshing = asyncio.ensure_future(self._refresh(city, service))
+            self._refreshing[key] = refreshing
+            refreshing.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+        return refreshing
+
+    @staticmethod
+    def _log_refresh_error(refreshing: asyncio.Future[ScheduleSnapshot]) -> None:
+        if not refreshing.cancelled() and (exc := refreshing.exception()):
+            logger.warning("Background refreshing failed: %r", exc)
+
+    async def _refresh(self, city: SupportedCity, service: SupportedService) -> ScheduleSnapshot:
+        key = (city, service)
+        schedule, fetched_at = await Parser(city=city).fetch_schedule(service)
+        if (previous := self._stored.get(key)) is None:
+            previous = from_stored(city, await asyncio.to_thread(load_outages, city, service))
+
+        diff = await asyncio.to_thread(diff_schedules, previous, schedule)
+        previous_snapshot = self._snapshots.get(key)
+        snapshot = ScheduleSnapshot(
+            schedule=schedule, refreshed_at=time.time(), fetched_at=fetched_at, diff=diff
+        )
+        self._snapshots[key] = snapshot
+        if diff:
+            logger.info(
+                "Schedule %s (%s) is changed: %i added, %i removed, %i rescheduled",
+                service,
+                city,
+                len(diff.added),
+                len(diff.removed),
+                len(diff.rescheduled),
+            )
+
+        # the time of the data is stored even if the data isn't changed (for restoring it)
+        if diff or previous_snapshot is None or previous_snapshot.fetched_at != fetched_at:
+            try:
+                await asyncio.to_thread(
+                    save_outages_diff,
+                    city,
+                    service,
+                    diff,
+                    fetched_at=datetime.datetime.fromtimestamp(fetched_at),
+                )
+                self._stored[key] = schedule
+            except Exception as exc:
+                # the next diff is built against the DB's state again
+                self._stored.pop(key, None)
+                logger.exception("Couldn't store outages of %s (%s): %r", service, city, exc)
+        else:
+            self._stored[key] = schedule
+
+        self._start_callbacks(city, service, schedule, diff)
+        return snapshot
+
+    def _start_callbacks(
+        self,
+        city: SupportedCity,
+        service: SupportedService,
+        schedule: ScheduleIndex,
+        diff: ScheduleDiff,
+    ) -> None:
+        if not self.on_refresh:
+            return
+
+        key = (city, service)
+        previous = self._callbacks.get(key)
+        task = asyncio.create_task(self._run_callbacks(city, service, schedule, diff, previous))
+        self._callbacks[key] = task
+        task.add_done_callback(
+            lambda _: self._callbacks.pop(key) if self._callbacks.get(key) is task else None
+        )
+
+    async def _run_callbacks(
+        self,
+        city: SupportedCity,
+        service: SupportedService,
+        schedule: ScheduleIndex,
+        diff: ScheduleDiff,
+        previous: asyncio.Task | None = None,
+    ) -> None:
+        if previous is not None:
+            # callbacks of the previous refreshing are finished first (e.g. not to notify twice)
+            await asyncio.wait([previous])
+
+        for callback in self.on_refresh:
+            try:
+                await callback(city, service, schedule, diff)
+            except Exception as exc:
+                logger.exception("Refresh callback failed for %s (%s): %r", service, city, exc)
+
+    async def wait_callbacks(self) -> None:
+        """Waits for all started callbacks"""
+        while self._callbacks:
+            await asyncio.wait(list(self._callbacks.values()))
+
+    async def close(self, timeout: float = SCHEDULE_CALLBACKS_SHUTDOWN_TIMEOUT) -> None:
+        """
+        Stops the refresher before shutdown (while the DB is still available): in-flight
+        refreshings and started callbacks get `timeout` seconds to finish (e.g. to store
+        sent notifications, so they aren't sent again after restart), then they are cancelled
+        """
+        try:
+            await asyncio.wait_for(self._wait_all(), timeout=timeout)
+        except TimeoutError:
+            logger.warning("Refreshing isn't finished in %.0fs, cancelling it", timeout)
+            tasks = [*self._refreshing.values(), *self._callbacks.values()]
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _wait_all(self) -> None:
+        # refreshing starts its callbacks when it is finished, so both are awaited until none left
+        while tasks := [*self._refreshing.values(), *self._callbacks.values()]:
+            await asyncio.wait(tasks)
+
+    async def refresh_all(self) -> None:
+        """Refreshes schedules of all providers (failed ones keep their previous snapshots)"""
+        for provider in get_providers():
+            try:
+                await self.refresh(provider.city, provider.service)
+            except Exception as exc:
+                logger.exception(
+                    "Couldn't refresh %s (%s): %r", provider.service, provider.city, exc
+                )
+
+    async def run(self) -> None:
+        """Refreshes schedules forever (random jitter spreads requests to the upstream)"""
+        while True:
+            started_at = time.monotonic()
+            await self.refresh_all()
+            logger.info("Schedules are refreshed in %.2fs", time.monotonic() - started_at)
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+
+
+_schedule_refresher: ScheduleRefresher | None = None
+
+
+def get_schedule_refresher() -> ScheduleRefresher:
+    """Returns the app's shared refresher (it is created on the first call)"""
+    global _schedule_refresher
+    if _schedule_refresher is None:
+        _schedule_refresher = ScheduleRefresher()
+
+    return _schedule_refresher
@@ -1,9 +1,13 @@
+import asyncio
 import datetime
+import logging
 from typing import NamedTuple
 
-from src.config.app import SupportedService, SupportedCity
-from src.db.models import Address
-from src.parsing.main_parsing import Parser
+from src.config.app import SupportedService, SupportedCity, SHUTDOWNS_FETCH_TIMEOUT
+from src.db.models import Address, DateRange
+from src.providers.scheduler import get_schedule_refresher
+
+logger = logging.getLogger(__name__)
 
 
 class ShutDownInfo(NamedTuple):
@@ -23,50 +27,109 @@ class ShutDownInfo(NamedTuple):
 class ShutDownByServiceInfo(NamedTuple):
     service: SupportedService
     shutdowns: list[ShutDownInfo]
+    # is set when the shutdowns are found in stale schedule (e.g. upstream is unavailable)
+    stale_since: datetime.datetime | None = None
+
+
+class ShutDownsLookup(NamedTuple):
+    """Found shutdowns of addresses and (service, address) pairs which couldn't be checked"""
+
+    shutdowns: list[ShutDownByServiceInfo]
+    failed: list[tuple[SupportedService, str]]
 
 
 class ShutDownProvider:
     @classmethod
-    def for_address(cls, address: str, service: SupportedService) -> list[ShutDownInfo]:
+    async def for_address(cls, address: str, service: SupportedService) -> list[ShutDownInfo]:
+        """
+        Finds shutdowns in the newest (pre-warmed by background refresher) schedule,
+        the schedule is fetched on demand only if it isn't refreshed yet
+        """
+        return (await cls.for_address_by_service(address, service)).shutdowns
+
+    @classmethod
+    async def for_address_by_service(
+        cls, address: str, service: SupportedService
+    ) -> ShutDownByServiceInfo:
+        """The same as `for_address`, but the result is marked if the schedule is stale"""
         user_address = Address.from_string(raw_address=address)
-        service_data_parser = Parser(city=user_address.city)
-        shutdowns = service_data_parser.parse(service, user_address=user_address)
-        print(shutdowns)
+        refresher = get_schedule_refresher()
+        snapshot = await refresher.get_or_refresh(user_address.city, service)
+        shutdowns = snapshot.schedule.find(user_address)
+        logger.debug("Found shutdowns for %s (%s): %s", user_address, service, shutdowns)
+        return ShutDownByServiceInfo(
+            service=service,
+            shutdowns=cls._to_shutdowns(shutdowns, city=user_address.city),
+            stale_since=(
+                datetime.datetime.fromtimestamp(snapshot.fetched_at)
+                if refresher.is_stale(snapshot)
+                else None
+            ),
+        )
+
+    @classmethod
+    async def for_addresses(cls, addresses: list[str]) -> ShutDownsLookup:
+        """Returns a structure with ShutDownInfo instances
+        All (service, address) pairs are fetched concurrently (requests to the same upstream
+        host are limited by HTTP_MAX_CONNECTIONS_PER_HOST), each pair is limited by
+        SHUTDOWNS_FETCH_TIMEOUT: failed pairs are returned separately, so the result can be
+        partial (but it is never confused with "no shutdowns").
+
+        Examples:
+        ShutDownsLookup(
+            shutdowns=[
+                ShutDownByServiceInfo(
+                    service=SupportedService.ELECTRICITY,
+                    shutdowns=[
+                        ShutDownInfo(start=data_range.start, end=data_range.end, address=address.raw)
+                    ]
+                )
+            ],
+            failed=[(SupportedService.HOT_WATER, address.raw)],
+        )
+
+        """
+        pairs = [
+            (service, address) for service in SupportedService.members() for address in addresses
+        ]
+        results = await asyncio.gather(
+            *(cls._for_address_with_timeout(address, service) for service, address in pairs)
+        )
+        return ShutDownsLookup(
+            shutdowns=[result for result in results if result and result.shutdowns],
+            failed=[pair for pair, result in zip(pairs, results) if result is None],
+        )
+
+    @classmethod
+    async def _for_address_with_timeout(
+        cls, address: str, service: SupportedService, timeout: float = SHUTDOWNS_FETCH_TIMEOUT
+    ) -> ShutDownByServiceInfo | None:
+        """Fetches shutdowns for the single pair, failed (or too slow) pair gives None"""
+        try:
+            return await asyncio.wait_for(
+                cls.for_address_by_service(address, service), timeout=timeout
+            )
+        except TimeoutError:
+            logger.warning("Fetching shutdowns timed out: %s (%s)", address, service)
+        except Exception as exc:
+            logger.exception("Couldn't fetch shutdowns: %s (%s): %r", address, service, exc)
+
+        return None
+
+    @staticmethod
+    def _to_shutdowns(
+        found_ranges: dict[Address, set[DateRange]], city: SupportedCity
+    ) -> list[ShutDownInfo]:
         result: list[ShutDownInfo] = []
-        for address, data_ranges in shutdowns.items():
-            print(address, data_ranges)
+        for address, data_ranges in found_ranges.items():
             for data_range in data_ranges:
                 result.append(
                     ShutDownInfo(
                         start=data_range.start,
                         end=data_range.end,
                         raw_address=address.raw,
-                        city=user_address.city,
+                        city=city,
                     )
                 )
 
         return result
-
-    @classmethod
-    def for_addresses(cls, addresses: list[str]) -> list[ShutDownByServiceInfo]:
-        """Returns a structure with ShutDownInfo instances
-        Examples:
-        [
-            ShutDownByServiceInfo(
-                service=SupportedService.ELECTRICITY,
-                shutdowns=[
-                    ShutDownInfo(start=data_range.start, end=data_range.end, address=address.raw)
-                ]
-            )
-        ]
-
-        """
-        shutdown_info_list = []
-        for service in SupportedService.members():
-            for address in addresses:
-                if shutdowns := cls.for_address(address, service):
-                    shutdown_info_list.append(
-                        ShutDownByServiceInfo(service=service, shutdowns=shutdowns)
-                    )
-
-        return shutdown_info_list
@@ -0,0 +1,177 @@
+from collections import OrderedDict
+
+import httpx
+import pytest
+
+from src.db.engine import create_db_engine
+from src.db.utils import create_tables
+from src.parsing.cache import PageCache
+from src.parsing.main_parsing import Parser
+
+ROW_TEMPLATE = """
+<tr>
+    <td>Санкт-Петербург</td>
+    <td>Район</td>
+    <td>Плановые работы</td>
+    <td class="rowStreets"><span>{streets}</span></td>
+    <td>Филиал</td>
+    <td>{date_start}</td>
+    <td>{time_start}</td>
+    <td>{date_end}</td>
+    <td>{time_end}</td>
+</tr>
+"""
+
+
+def make_rows(count: int) -> list[dict[str, str]]:
+    """Generates synthetic rows (with different streets, houses' ranges and dates)"""
+    street_types = ["ул.", "пр.", "пер.", "наб.", "ш."]
+    rows = []
+    for index in range(count):
+        day = index % 28 + 1
+        streets = ", ".join(
+            f"{street_types[(index + shift) % 5]} Street{(index + shift) % 500} "
+            f"д.{shift * 10 + 1}-{shift * 10 + 9}"
+            for shift in range(index % 3 + 1)
+        )
+        rows.append(
+            {
+                "streets": streets,
+                "date_start": f"{day:02}-06-2024",
+                "time_start": "09:00",
+                "date_end": f"{day:02}-06-2024",
+                "time_end": "17:00",
+            }
+        )
+
+    return rows
+
+
+def make_page(rows: list[dict[str, str]]) -> str:
+    """Builds rosseti-like HTML page with given rows (keys: streets, date/time start/end)"""
+    content = "".join(ROW_TEMPLATE.format(**row) for row in rows)
+    return f"<html><body><table><tbody>{content}</tbody></table></body></html>"
+
+
+@pytest.fixture
+def page_rows() -> list[dict[str, str]]:
+    return [
+        {
+            "streets": "ул. Street Name д.75-77",
+            "date_start": "10-06-2024",
+            "time_start": "09:00",
+            "date_end": "10-06-2024",
+            "time_end": "17:00",
+        },
+        {
+            "streets": "пр. Avenue Name д.12",
+            "date_start": "11-06-2024",
+            "time_start": "10:00",
+            "date_end": "11-06-2024",
+            "time_end": "12:00",
+        },
+    ]
+
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.parsing.cache._page_cache", PageCache(path=tmp_path / "cache"))
+    monkeypatch.setattr(Parser, "_parsed_results", OrderedDict())
+    monkeypatch.setattr("src.parsing.http._host_rate_limiters", {})
+    monkeypatch.setattr("src.parsing.http.HTTP_MAX_REQUESTS_PER_SECOND", 0)
+    monkeypatch.setattr("src.providers.scheduler._schedule_refresher", None)
+    monkeypatch.setattr("src.parsing.breaker._circuit_breakers", {})
+    return tmp_path
+
+
+@pytest.fixture
+def single_window(monkeypatch):
+    """The whole date range is fetched by single request (for tests of single page's fetching)"""
+    monkeypatch.setattr(Parser, "chunk_days", 0)
+
+
+@pytest.fixture
+def db_engine(tmp_path, monkeypatch):
+    engine = create_db_engine(tmp_path / "test.sqlite3")
+    create_tables(engine)
+    monkeypatch.setattr("src.db.engine._engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def requests() -> list[httpx.Request]:
+    return []
+
+
+@pytest.fixture
+def http_client(page_rows, requests) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, text=make_page(page_rows))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def shared_http_client(http_client, monkeypatch) -> httpx.AsyncClient:
+    monkeypatch.setattr("src.parsing.http._http_client", http_client)
+    return http_client
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-benchmarks",
+        action="store_true",
+        default=False,
+        help="run performance benchmarks (tests marked as 'benchmark')",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: performance benchmark")
+    config.benchmark_results = []
+
+
+def record_benchmark(
+    request: pytest.FixtureRequest, rows: int, elapsed: float, peak_memory: int | None = None
+) -> float:
+    """Records the benchmark's result for the summary (peak memory is optional), returns rows/sec"""
+    rows_per_sec = rows / elapsed
+    request.config.benchmark_results.append(
+        {
+            "name": request.node.name,
+            "rows": rows,
+            "time": elapsed,
+            "rows_per_sec": rows_per_sec,
+            "peak_memory": peak_memory,
+        }
+    )
+    return rows_per_sec
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason="use --run-benchmarks option to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.benchmark_results:
+        return
+
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'name':<40} {'rows':>8} {'time, s':>10} {'rows/sec':>12} {'peak RSS, MB':>14}"
+    )
+    for result in config.benchmark_results:
+        peak_memory = result["peak_memory"]
+        peak_memory = "-" if peak_memory is None else f"{peak_memory / 1024 / 1024:.2f}"
+        terminalreporter.write_line(
+            f"{result['name']:<40} {result['rows']:>8} {result['time']:>10.3f} "
+            f"{result['rows_per_sec']:>12.0f} {peak_memory:>14}"
+        )
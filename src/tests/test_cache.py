@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from src.config.app import SupportedService
+from src.parsing.cache import PageCache
+
+SERVICE = SupportedService.ELECTRICITY
+
+
+@pytest.fixture
+def cache(tmp_path) -> PageCache:
+    return PageCache(path=tmp_path, ttl={SERVICE: 60}, max_size=1000, memory_max_items=2)
+
+
+@pytest.mark.asyncio
+async def test_get__memory_and_disk_hits(cache):
+    await cache.set(SERVICE, "key", "content", etag='"v1"')
+    assert (await cache.get(SERVICE, "key")).content == "content"
+
+    cache._memory.clear()
+    entry = await cache.get(SERVICE, "key")
+    assert (entry.content, entry.etag) == ("content", '"v1"')
+    assert await cache.get(SERVICE, "unknown") is None
+    assert (cache.stats.memory_hits, cache.stats.disk_hits, cache.stats.misses) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_get__expired(cache, tmp_path):
+    await cache.set(SERVICE, "key", "content", last_modified="Mon, 10 Jun 2024 09:00:00 GMT")
+    cache._memory.clear()
+    expired_time = time.time() - 61
+    os.utime(tmp_path / "electricity_key.html", times=(expired_time, expired_time))
+
+    assert await cache.get(SERVICE, "key") is None
+    assert cache.stats.expired == 1
+
+    stale_entry = await cache.get_stale(SERVICE, "key")
+    assert stale_entry.validators() == {"If-Modified-Since": "Mon, 10 Jun 2024 09:00:00 GMT"}
+
+    await cache.revalidate(SERVICE, "key")
+    cache._memory.clear()
+    assert (await cache.get(SERVICE, "key")).content == "content"
+
+
+@pytest.mark.asyncio
+async def test_set__lru_eviction(cache, tmp_path):
+    await cache.set(SERVICE, "first", "1" * 400)
+    await cache.set(SERVICE, "second", "2" * 400)
+    os.utime(tmp_path / "electricity_second.html", times=(time.time() - 10, time.time()))
+    await cache.set(SERVICE, "third", "3" * 400)
+
+    assert sorted(file.name for file in tmp_path.glob("*.html")) == [
+        "electricity_first.html",
+        "electricity_third.html",
+    ]
+    assert not (tmp_path / "electricity_second.json").exists()
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_set__memory_hits_kept_by_eviction(cache, tmp_path):
+    await cache.set(SERVICE, "first", "1" * 400)
+    await cache.set(SERVICE, "second", "2" * 400)
+    os.utime(tmp_path / "electricity_first.html", times=(time.time() - 10, time.time()))
+    os.utime(tmp_path / "electricity_second.html", times=(time.time() - 5, time.time()))
+    assert await cache.get(SERVICE, "first")  # memory tier's hit
+    await cache.set(SERVICE, "third", "3" * 400)
+
+    assert sorted(file.name for file in tmp_path.glob("*.html")) == [
+        "electricity_first.html",
+        "electricity_third.html",
+    ]
+    assert cache.stats.memory_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_set__concurrent_writes(tmp_path):
+    cache = PageCache(path=tmp_path, ttl={SERVICE: 60}, max_size=20_000, memory_max_items=2)
+    await asyncio.gather(*(cache.set(SERVICE, f"key{i}", "x" * 500) for i in range(200)))
+    await asyncio.gather(*(cache.set_parsed(f"parsed{i}", {"rows": [i] * 50}) for i in range(50)))
+
+    disk_size = sum(file.stat().st_size for file in cache._disk_tier_files())
+    assert cache._disk_size == disk_size
+    assert disk_size <= cache.max_size
+    assert cache.stats.evictions > 0
+
+
+@pytest.mark.asyncio
+async def test_clear(cache, tmp_path):
+    await cache.set(SERVICE, "key", "content")
+    await cache.set_parsed("parsed", {"key": "value"})
+    await cache.clear()
+
+    assert await cache.get(SERVICE, "key") is None
+    assert await cache.get_parsed("parsed") is None
+    assert list(tmp_path.rglob("*.*")) == []
+
+
+@pytest.mark.asyncio
+async def test_invalidate(cache):
+    await cache.set(SERVICE, "key", "content")
+    await cache.invalidate(SERVICE, "key")
+    assert await cache.get(SERVICE, "key") is None
@@ -0,0 +1,85 @@
+import datetime
+
+from src.config.app import SupportedCity, SupportedService
+from src.db.models import DateRange
+from src.db.utils import (
+    save_subscriber_addresses,
+    save_outages,
+    save_outages_diff,
+    load_outages,
+    load_fetched_at,
+    get_affected_subscribers,
+    get_pending_subscribers,
+    update_pending_subscribers,
+)
+from src.parsing.diff import diff_schedules, from_stored
+from src.parsing.index import ScheduleIndex
+
+START = datetime.datetime(2024, 6, 10, 9)
+END = datetime.datetime(2024, 6, 10, 17)
+
+
+def test_get_affected_subscribers(db_engine):
+    with db_engine.begin() as connection:
+        save_subscriber_addresses(connection, 1, ["ул. Street Name д.76", "ул. Other д.1"])
+        save_subscriber_addresses(connection, 2, ["ул. street  name д.80"])
+
+    schedule = ScheduleIndex()
+    schedule.add(
+        SupportedCity.SPB, "Street Name", (75, 77), "Street Name д.75-77", DateRange(START, END)
+    )
+    schedule.add(SupportedCity.SPB, "Other", (1, 1), "Other д.1", DateRange(START, START))
+    save_outages(SupportedCity.SPB, SupportedService.ELECTRICITY, schedule)
+
+    result = get_affected_subscribers(since=START + datetime.timedelta(hours=1))
+
+    assert [(item.subscriber_id, item.address, item.outage_address) for item in result] == [
+        (1, "ул. Street Name д.76", "Street Name д.75-77"),
+    ]
+
+
+def test_save_outages__replaces_previous(db_engine):
+    schedule = ScheduleIndex()
+    schedule.add(SupportedCity.SPB, "Street", (1, 3), "Street д.1-3", DateRange(START, END))
+
+    assert save_outages(SupportedCity.SPB, SupportedService.ELECTRICITY, schedule) == 1
+    assert save_outages(SupportedCity.SPB, SupportedService.ELECTRICITY, ScheduleIndex()) == 0
+    assert get_affected_subscribers(since=START) == []
+
+
+def test_pending_subscribers(db_engine):
+    with db_engine.begin() as connection:
+        save_subscriber_addresses(connection, 1, ["ул. Street Name д.76"])
+        save_subscriber_addresses(connection, 2, ["ул. Other д.1"])
+
+    update_pending_subscribers(SupportedCity.SPB, SupportedService.ELECTRICITY, [1, 2], [])
+    # unchanged addresses don't make the subscriber pending again
+    with db_engine.begin() as connection:
+        save_subscriber_addresses(connection, 1, ["ул. Street Name д.76"])
+        save_subscriber_addresses(connection, 2, ["ул. Other д.2"])
+
+    update_pending_subscribers(SupportedCity.SPB, SupportedService.COLD_WATER, [], [1])
+
+    assert get_pending_subscribers(SupportedCity.SPB, SupportedService.ELECTRICITY) == [2]
+    assert sorted(get_pending_subscribers(SupportedCity.SPB, SupportedService.COLD_WATER)) == [1, 2]
+
+
+def test_save_outages_diff(db_engine):
+    old = ScheduleIndex()
+    old.add(SupportedCity.SPB, "Street", (1, 3), "Street д.1-3", DateRange(START, END))
+    old.add(SupportedCity.SPB, "Other", (5, 5), "Other д.5", DateRange(START, None))
+    save_outages(SupportedCity.SPB, SupportedService.ELECTRICITY, old)
+    new = ScheduleIndex()
+    new.add(SupportedCity.SPB, "Street", (1, 3), "Street д.1-3", DateRange(START, END))
+    new.add(SupportedCity.SPB, "Street", (7, 9), "Street д.7-9", DateRange(START, END))
+
+    diff = diff_schedules(old, new)
+    assert load_fetched_at(SupportedCity.SPB, SupportedService.ELECTRICITY) is None
+    save_outages_diff(SupportedCity.SPB, SupportedService.ELECTRICITY, diff, fetched_at=START)
+    stored = from_stored(
+        SupportedCity.SPB, load_outages(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    )
+
+    assert (len(diff.added), len(diff.removed)) == (1, 1)
+    assert not diff_schedules(stored, new)
+    assert load_fetched_at(SupportedCity.SPB, SupportedService.ELECTRICITY) == START
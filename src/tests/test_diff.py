@@ -0,0 +1,48 @@
+import datetime
+
+from src.config.app import SupportedCity
+from src.db.models import DateRange
+from src.parsing.diff import diff_schedules
+from src.parsing.index import ScheduleIndex
+
+DAY = datetime.datetime(2024, 6, 10, 9)
+RANGE_1 = DateRange(DAY, DAY + datetime.timedelta(hours=8))
+RANGE_2 = DateRange(DAY + datetime.timedelta(days=1), DAY + datetime.timedelta(days=1, hours=8))
+
+
+def make_schedule(*outages: tuple[str, tuple[int, int], DateRange]) -> ScheduleIndex:
+    schedule = ScheduleIndex()
+    for street, houses, date_range in outages:
+        schedule.add(SupportedCity.SPB, street, houses, f"ул. {street} д.{houses}", date_range)
+
+    return schedule
+
+
+def test_diff_schedules():
+    old = make_schedule(
+        ("Street", (1, 5), RANGE_1),  # unchanged
+        ("Street", (7, 9), RANGE_1),  # rescheduled
+        ("Other", (1, 1), RANGE_1),  # removed
+    )
+    new = make_schedule(
+        ("Street", (1, 5), RANGE_1),
+        ("Street", (7, 9), RANGE_2),
+        ("Other", (2, 2), RANGE_2),  # added
+    )
+
+    diff = diff_schedules(old, new)
+
+    assert [(outage.street, outage.house_start) for outage in diff.added] == [("other", 2)]
+    assert [(outage.street, outage.house_start) for outage in diff.removed] == [("other", 1)]
+    assert [(item.old.date_range, item.new.date_range) for item in diff.rescheduled] == [
+        (RANGE_1, RANGE_2)
+    ]
+    assert len(diff.new_schedule()) == 2
+
+
+def test_diff_schedules__stable_fingerprints():
+    outages = [("Street", (1, 5), RANGE_1), ("Street", (1, 5), RANGE_2)]
+    schedule = make_schedule(*outages)
+
+    assert not diff_schedules(schedule, make_schedule(*reversed(outages)))
+    assert len(diff_schedules(None, schedule).added) == 2
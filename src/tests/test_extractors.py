@@ -42,4 +42,4 @@ from src.utils import get_street_and_house
 )
 def test_extract_street_and_house_info(address, expected_result):
     street, houses = get_street_and_house(address)
-    assert {"street": street, "houses": houses} == expected_result
+    assert {"street": street, "houses": list(houses)} == expected_result
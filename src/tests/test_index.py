@@ -0,0 +1,56 @@
+import datetime
+
+import pytest
+
+from src.config.app import SupportedCity
+from src.db.models import Address, DateRange
+from src.parsing.index import ScheduleIndex
+
+DATE_RANGE_1 = DateRange(datetime.datetime(2024, 6, 10, 9), datetime.datetime(2024, 6, 10, 17))
+DATE_RANGE_2 = DateRange(datetime.datetime(2024, 6, 11, 9), datetime.datetime(2024, 6, 11, 17))
+
+
+@pytest.fixture
+def schedule_index() -> ScheduleIndex:
+    index = ScheduleIndex()
+    index.add(SupportedCity.SPB, "Street Name", (1, 300), "ул. Street Name д.1-300", DATE_RANGE_1)
+    index.add(SupportedCity.SPB, "Street Name", (12, 12), "ул. Street Name д.12", DATE_RANGE_2)
+    index.add(SupportedCity.SPB, "Other Street", (5, 7), "ул. Other Street д.5-7", DATE_RANGE_2)
+    return index
+
+
+@pytest.mark.parametrize(
+    "street, house, expected_result",
+    [
+        (
+            "Street Name",
+            12,
+            {"ул. Street Name д.1-300": {DATE_RANGE_1}, "ул. Street Name д.12": {DATE_RANGE_2}},
+        ),
+        ("street  name", 300, {"ул. Street Name д.1-300": {DATE_RANGE_1}}),
+        ("Street Name", 301, {}),
+        ("Other Street", 4, {}),
+        ("Other Street", 6, {"ул. Other Street д.5-7": {DATE_RANGE_2}}),
+        ("Unknown Street", 6, {}),
+        ("Street Name", None, {}),
+    ],
+)
+def test_find(schedule_index, street, house, expected_result):
+    address = Address(city=SupportedCity.SPB, street=street, house=house, raw="")
+    result = schedule_index.find(address)
+    assert {address.raw: date_ranges for address, date_ranges in result.items()} == expected_result
+
+
+def test_wide_range_stored_once(schedule_index):
+    assert len(schedule_index) == 3
+
+
+def test_dump_and_load(schedule_index):
+    loaded_index = ScheduleIndex.load(schedule_index.dump())
+
+    assert list(loaded_index.items()) == list(schedule_index.items())
+
+
+def test_load__unsupported_version(schedule_index):
+    with pytest.raises(ValueError):
+        ScheduleIndex.load(schedule_index.dump() | {"version": 0})
@@ -0,0 +1,61 @@
+import datetime
+import time
+
+import pytest
+
+from src.config.app import SupportedCity
+from src.db.models import DateRange
+from src.db.utils import SubscriberAddress
+from src.parsing.index import ScheduleIndex
+from src.providers.matcher import ScheduleMatcher
+from src.tests.conftest import record_benchmark
+
+STREETS_COUNT = 5_000
+DATE_START = datetime.datetime(2024, 6, 1, 9)
+
+
+def make_subscribers(count: int) -> list[SubscriberAddress]:
+    return [
+        SubscriberAddress(
+            subscriber_id=index,
+            city=SupportedCity.SPB,
+            street=f"street{index % STREETS_COUNT}",
+            house=index % 200 + 1,
+            raw=f"ул. Street{index % STREETS_COUNT} д.{index % 200 + 1}",
+        )
+        for index in range(count)
+    ]
+
+
+def make_schedule(days: int, outages_per_day: int) -> ScheduleIndex:
+    schedule = ScheduleIndex()
+    for day in range(days):
+        start = DATE_START + datetime.timedelta(days=day)
+        date_range = DateRange(start, start + datetime.timedelta(hours=8))
+        for index in range(outages_per_day):
+            street = f"Street{(day * outages_per_day + index) % STREETS_COUNT}"
+            house_start = index % 150 + 1
+            schedule.add(
+                SupportedCity.SPB,
+                street,
+                (house_start, house_start + 20),
+                f"ул. {street} д.{house_start}-{house_start + 20}",
+                date_range,
+            )
+
+    return schedule
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("subscribers_count", [10_000, 100_000])
+def test_schedule_matcher(request, subscribers_count):
+    schedule = make_schedule(days=90, outages_per_day=100)
+    matcher = ScheduleMatcher(make_subscribers(subscribers_count))
+
+    # matching itself (encoding of outages and the join), without building result's tuples
+    started_at = time.perf_counter()
+    matches = matcher.join(matcher.encode(SupportedCity.SPB, schedule), since=DATE_START)
+    elapsed = time.perf_counter() - started_at
+
+    record_benchmark(request, subscribers_count, elapsed)
+    assert matches
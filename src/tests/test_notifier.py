@@ -0,0 +1,120 @@
+import datetime
+from unittest import mock
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramAPIError
+
+from src.config.app import SupportedCity, SupportedService
+from src.db.models import DateRange
+from src.db.utils import SubscriberAddress, save_subscriber_addresses, get_subscribers_addresses
+from src.parsing.diff import diff_schedules
+from src.parsing.index import ScheduleIndex
+from src.providers.matcher import ScheduleMatcher
+from src.providers.notifier import ShutDownNotifier
+
+START = datetime.datetime.now() + datetime.timedelta(days=1)
+END = START + datetime.timedelta(hours=8)
+
+
+def _schedule(date_range: DateRange) -> ScheduleIndex:
+    schedule = ScheduleIndex()
+    schedule.add(SupportedCity.SPB, "Street Name", (75, 77), "Street Name д.75-77", date_range)
+    return schedule
+
+
+def test_schedule_matcher():
+    matcher = ScheduleMatcher(
+        [
+            SubscriberAddress(1, SupportedCity.SPB, "street name", 76, "ул. Street Name д.76"),
+            SubscriberAddress(2, SupportedCity.SPB, "street name", 80, "ул. Street Name д.80"),
+            SubscriberAddress(3, SupportedCity.SPB, "other", 76, "ул. Other д.76"),
+            SubscriberAddress(4, SupportedCity.SPB, "street name", None, "ул. Street Name"),
+        ]
+    )
+    schedule = _schedule(DateRange(START, END))
+    schedule.add(SupportedCity.SPB, "Other", (1, 100), "Other д.1-100", DateRange(START, START))
+
+    found = matcher.match(SupportedCity.SPB, schedule, since=START + datetime.timedelta(hours=1))
+
+    assert len(matcher) == 3
+    assert [(match.subscriber.subscriber_id, match.raw) for match in found] == [
+        (1, "Street Name д.75-77")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_notify__sends_only_new_outages(db_engine):
+    with db_engine.begin() as connection:
+        save_subscriber_addresses(connection, 1, ["ул. Street Name д.76"])
+        save_subscriber_addresses(connection, 2, ["ул. Street Name д.80"])
+
+    bot = AsyncMock()
+    notifier = ShutDownNotifier(bot)
+    service = SupportedService.ELECTRICITY
+
+    assert await notifier.notify(SupportedCity.SPB, service, _schedule(DateRange(START, END))) == 1
+    assert bot.send_message.await_args.kwargs["chat_id"] == 1
+
+    # the same outage isn't sent twice
+    assert await notifier.notify(SupportedCity.SPB, service, _schedule(DateRange(START, END))) == 0
+
+    # rescheduled outage is a new one
+    rescheduled = DateRange(START, END + datetime.timedelta(hours=1))
+    assert await notifier.notify(SupportedCity.SPB, service, _schedule(rescheduled)) == 1
+    assert bot.send_message.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_notify__unsent_outages_retried(db_engine):
+    with db_engine.begin() as connection:
+        save_subscriber_addresses(connection, 1, ["ул. Street Name д.76"])
+
+    bot = AsyncMock()
+    bot.send_message.side_effect = TelegramAPIError(method=AsyncMock(), message="Bad Gateway")
+    notifier = ShutDownNotifier(bot)
+    service = SupportedService.ELECTRICITY
+    schedule = _schedule(DateRange(START, END))
+    unchanged_diff = diff_schedules(schedule, schedule)
+
+    assert await notifier.notify(SupportedCity.SPB, service, schedule) == 0
+
+    # the schedule isn't changed, but the outage isn't sent yet
+    bot.send_message.side_effect = None
+    assert await notifier.notify(SupportedCity.SPB, service, schedule, unchanged_diff) == 1
+
+    # new subscriber gets already published outage
+    with db_engine.begin() as connection:
+        save_subscriber_addresses(connection, 2, ["ул. Street Name д.77"])
+
+    assert await notifier.notify(SupportedCity.SPB, service, schedule, unchanged_diff) == 1
+    assert bot.send_message.await_args.kwargs["chat_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_notify__matches_diff_only(db_engine):
+    with db_engine.begin() as connection:
+        save_subscriber_addresses(connection, 1, ["ул. Street Name д.76"])
+
+    bot = AsyncMock()
+    notifier = ShutDownNotifier(bot)
+    service = SupportedService.ELECTRICITY
+    schedule = _schedule(DateRange(START, END))
+    # new subscriber is pending: the whole schedule is matched for it
+    assert await notifier.notify(
+        SupportedCity.SPB, service, schedule, diff_schedules(None, schedule)
+    )
+
+    rescheduled = _schedule(DateRange(START, END + datetime.timedelta(hours=1)))
+    with mock.patch(
+        "src.providers.notifier.get_subscribers_addresses", wraps=get_subscribers_addresses
+    ) as mock_get_addresses:
+        # nothing is changed: subscribers' addresses aren't even loaded
+        unchanged_diff = diff_schedules(schedule, schedule)
+        assert await notifier.notify(SupportedCity.SPB, service, schedule, unchanged_diff) == 0
+        mock_get_addresses.assert_not_called()
+
+        # only addresses on the changed streets are matched with the diff
+        diff = diff_schedules(schedule, rescheduled)
+        assert await notifier.notify(SupportedCity.SPB, service, rescheduled, diff) == 1
+        mock_get_addresses.assert_called_once_with(SupportedCity.SPB, streets=["street name"])
@@ -0,0 +1,417 @@
+import asyncio
+import datetime
+from unittest import mock
+
+import httpx
+import pytest
+from lxml import etree
+
+from src.config.app import SupportedCity, SupportedService
+from src.db.models import Address, DateRange
+from src.parsing.breaker import CircuitOpenError, get_circuit_breaker
+from src.parsing.extractors import RowsLayout, find_page_numbers
+from src.parsing.main_parsing import Parser
+from src.parsing.registry import (
+    Provider,
+    UnknownProviderError,
+    get_provider,
+    register_provider,
+)
+from src.tests.conftest import make_page
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("streaming", [True, False])
+async def test_parse__found_address(data_path, http_client, requests, streaming, monkeypatch):
+    monkeypatch.setattr(Parser, "streaming", streaming)
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    user_address = Address.from_string("ул. Street Name, д.76")
+
+    result = await parser.parse(SupportedService.ELECTRICITY, user_address=user_address)
+
+    expected_range = DateRange(
+        datetime.datetime(2024, 6, 10, 9, 0),
+        datetime.datetime(2024, 6, 10, 17, 0),
+    )
+    assert list(result.values()) == [{expected_range}]
+    assert len(requests) == len(parser._get_windows())
+
+
+@pytest.mark.asyncio
+async def test_parse__unknown_address(data_path, http_client):
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    user_address = Address.from_string("ул. Other Street, д.1")
+
+    result = await parser.parse(SupportedService.ELECTRICITY, user_address=user_address)
+
+    assert result == {}
+
+
+@pytest.mark.asyncio
+async def test_parse__not_modified_page_revalidated(data_path, single_window, page_rows):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=make_page(page_rows), headers={"ETag": '"v1"'})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    user_address = Address.from_string("ул. Street Name д.76")
+
+    result = await parser.parse(SupportedService.ELECTRICITY, user_address=user_address)
+    with mock.patch.object(Parser, "_parse_content") as mock_parse_content:
+        refreshed_result = await parser.parse(
+            SupportedService.ELECTRICITY, user_address=user_address, refresh=True
+        )
+
+    assert refreshed_result == result
+    assert [response.headers.get("If-None-Match") for response in requests] == [None, '"v1"']
+    mock_parse_content.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_parse__not_modified_page_evicted(data_path, single_window, page_rows):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=make_page(page_rows), headers={"ETag": '"v1"'})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    user_address = Address.from_string("ул. Street Name д.76")
+
+    result = await parser.parse(SupportedService.ELECTRICITY, user_address=user_address)
+    # the page is evicted while its conditional request is in flight
+    with mock.patch.object(parser.cache, "revalidate", return_value=None):
+        refreshed_result = await parser.parse(
+            SupportedService.ELECTRICITY, user_address=user_address, refresh=True
+        )
+
+    assert refreshed_result == result
+    assert [request.headers.get("If-None-Match") for request in requests] == [None, '"v1"', None]
+    assert get_circuit_breaker("spb_electricity").failures == 0
+
+
+@pytest.mark.asyncio
+async def test_parse__persisted_parsed_result(data_path, http_client):
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    user_address = Address.from_string("ул. Street Name д.76")
+    result = await parser.parse(SupportedService.ELECTRICITY, user_address=user_address)
+
+    # emulate restart of the app: in-memory results are lost, persisted ones are used
+    Parser._parsed_results.clear()
+    with mock.patch.object(Parser, "_parse_content") as mock_parse_content:
+        restored_result = await parser.parse(
+            SupportedService.ELECTRICITY, user_address=user_address
+        )
+
+    assert restored_result == result
+    mock_parse_content.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_parse__streamed_identical_page_reuses_result(
+    data_path, single_window, http_client, monkeypatch
+):
+    monkeypatch.setattr(Parser, "streaming", True)
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    result = await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    # the same bytes are downloaded again: they aren't streamed (nor parsed) the second time
+    with (
+        mock.patch.object(parser.cache, "set_parsed") as mock_set_parsed,
+        mock.patch.object(Parser, "_add_row") as mock_add_row,
+    ):
+        refreshed_result = await parser.parse_schedule(SupportedService.ELECTRICITY, refresh=True)
+
+    assert refreshed_result is result
+    mock_set_parsed.assert_not_called()
+    mock_add_row.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_parse__streamed_changed_page_parsed_again(
+    data_path, single_window, page_rows, monkeypatch
+):
+    monkeypatch.setattr(Parser, "streaming", True)
+    pages = [make_page(page_rows), make_page(page_rows[:1])]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=pages.pop(0))
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    result = await parser.parse_schedule(SupportedService.ELECTRICITY)
+    refreshed_result = await parser.parse_schedule(SupportedService.ELECTRICITY, refresh=True)
+
+    assert len(result) == 2
+    assert len(refreshed_result) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64 * 1024])
+def test_parse_content__streaming_equals_dom(page_rows, chunk_size, monkeypatch):
+    html_content = make_page(page_rows * 3)
+    parser = Parser(city=SupportedCity.SPB, http_client=mock.Mock(), cache=mock.Mock())
+    monkeypatch.setattr(parser, "stream_chunk_size", chunk_size)
+
+    monkeypatch.setattr(parser, "streaming", False)
+    dom_result = parser._parse_content(SupportedService.ELECTRICITY, None, html_content)
+    monkeypatch.setattr(parser, "streaming", True)
+    streaming_result = parser._parse_content(SupportedService.ELECTRICITY, None, html_content)
+
+    assert len(streaming_result) == 2
+    assert list(streaming_result.items()) == list(dom_result.items())
+
+
+@pytest.mark.asyncio
+async def test_parse__rows_tracing_disabled(data_path, http_client, capsys):
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    user_address = Address.from_string("ул. Street Name д.76")
+
+    with mock.patch("src.parsing.main_parsing.trace_logger") as mock_trace_logger:
+        mock_trace_logger.isEnabledFor.return_value = False
+        await parser.parse(SupportedService.ELECTRICITY, user_address=user_address)
+
+    mock_trace_logger.debug.assert_not_called()
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.asyncio
+async def test_parse__concurrent_requests_coalesced(data_path, http_client, requests):
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    user_addresses = [Address.from_string(f"ул. Street Name, д.{house}") for house in (75, 76, 77)]
+
+    results = await asyncio.gather(
+        *(
+            parser.parse(SupportedService.ELECTRICITY, user_address)
+            for user_address in user_addresses
+        )
+    )
+
+    assert len(requests) == len(parser._get_windows())
+    assert [len(result) for result in results] == [1, 1, 1]
+    assert Parser._in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_parse__circuit_breaker_opens(data_path, single_window, requests):
+    get_circuit_breaker("spb_electricity").failure_threshold = 2
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(503)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    with pytest.raises(CircuitOpenError):
+        await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_parse_schedule__chunked_windows(data_path, http_client, requests, monkeypatch):
+    monkeypatch.setattr(Parser, "chunk_days", 7)
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    windows = parser._get_windows()
+
+    result = await parser.parse_schedule(SupportedService.ELECTRICITY)
+    requests_count = len(requests)
+    await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    assert windows[0][0] == parser.date_start
+    assert windows[-1][1] == parser.finish_time_filter
+    assert all(finish.toordinal() % 7 == 6 for _, finish in windows[:-1])
+    assert all(
+        next_start - finish == datetime.timedelta(days=1)
+        for (_, finish), (next_start, _) in zip(windows, windows[1:])
+    )
+    assert requests_count == len(windows)
+    assert len(requests) == requests_count  # all chunks are cached
+    assert len(result) == 2  # the same rows of all chunks are merged
+
+
+def test_get_window_ttl(data_path):
+    parser = Parser(city=SupportedCity.SPB, http_client=mock.Mock())
+    parser.cache.ttl = {SupportedService.ELECTRICITY: 100}
+    parser.chunk_days = 7
+    parser.chunk_max_ttl = 250
+    windows = [
+        (parser.date_start + datetime.timedelta(days=days_ahead), parser.finish_time_filter)
+        for days_ahead in (0, 1, 7, 14, 70)
+    ]
+
+    ttls = [parser._get_window_ttl(SupportedService.ELECTRICITY, window) for window in windows]
+
+    # TTL depends on the chunk's distance from today (not on its position)
+    assert ttls == [100, 114, 200, 250, 250]
+
+
+@pytest.mark.asyncio
+async def test_parse_schedule__paginated_listing(data_path, single_window, page_rows):
+    requests = []
+    pages_rows = {
+        1: page_rows[:1],
+        2: page_rows[1:],
+        3: [{**page_rows[0], "streets": "ул. Other д.1"}],
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        page = int(request.url.params.get("PAGEN_1", 1))
+        # every page links the next one only (the last pages aren't visible from the first one)
+        link = f'<a href="?PAGEN_1={page + 1}&amp;sort=asc">{page + 1}</a>' if page < 3 else ""
+        return httpx.Response(
+            200, text=make_page(pages_rows[page]).replace("</table>", f"</table>{link}")
+        )
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+
+    result = await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    assert len(requests) == 3
+    assert sorted(street for _, street, _, _ in result.items()) == [
+        "avenue name",
+        "other",
+        "street name",
+    ]
+
+
+def test_find_page_numbers():
+    html_content = '<a href="/list?PAGEN_1=2">2</a><a href="/list?a=1&amp;PAGEN_1=3">3</a><a href="?PAGEN_10=4">'
+
+    assert find_page_numbers(html_content, "PAGEN_1") == {2, 3}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("streaming", [True, False])
+async def test_parse_schedule__registered_provider(data_path, streaming, monkeypatch):
+    requests = []
+    html_content = (
+        "<html><body><table><tbody><tr><td>ул. Water Street д.3-5</td><td>12.06.2024</td>"
+        "<td>08:00</td><td>13.06.2024</td><td>20:00</td></tr></tbody></table></body></html>"
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, text=html_content)
+
+    monkeypatch.setattr("src.parsing.registry._providers", {})
+    monkeypatch.setattr(Parser, "chunk_days", 7)
+    monkeypatch.setattr(Parser, "streaming", streaming)
+    register_provider(
+        Provider(
+            city=SupportedCity.SPB,
+            service=SupportedService.COLD_WATER,
+            url="https://water.example/works/",
+            layout=RowsLayout(
+                rows=etree.XPath("//table/tbody/tr"),
+                streets=etree.XPath("td[1]"),
+                street_texts=etree.XPath("text()"),
+                cell_texts=etree.XPath("td/text()"),
+                dates=slice(1, 5),
+            ),
+            datetime_format="%d.%m.%YT%H:%M",
+        )
+    )
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+
+    result = await parser.parse_schedule(SupportedService.COLD_WATER)
+
+    assert SupportedService.members() == [SupportedService.COLD_WATER]
+    assert len(requests) == 1  # the page isn't requested by date ranges, so it isn't chunked
+    assert list(result.find(Address.from_string("ул. Water Street д.4")).values()) == [
+        {DateRange(datetime.datetime(2024, 6, 12, 8), datetime.datetime(2024, 6, 13, 20))}
+    ]
+    with pytest.raises(UnknownProviderError):
+        await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+
+@pytest.mark.asyncio
+async def test_parse_schedule__multi_chunk_range(data_path, page_rows, monkeypatch):
+    monkeypatch.setattr(Parser, "chunk_days", 7)
+    parser = Parser(city=SupportedCity.SPB, http_client=mock.Mock())
+    windows = parser._get_windows()
+    window_starts = [parser._format_date(window_start) for window_start, _ in windows]
+    # the outage spans the boundary of the first two chunks, so both of them list it
+    spanning_row = {**page_rows[0], "date_start": "01-06-2024", "date_end": "02-06-2024"}
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        index = window_starts.index(request.url.params["date_start"])
+        rows = [{**page_rows[1], "streets": f"ул. Chunk {index} д.1"}]
+        if index < 2:
+            rows.append(spanning_row)
+        return httpx.Response(200, text=make_page(rows))
+
+    parser.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    assert len(windows) > 2
+    assert sorted(
+        (request.url.params["date_start"], request.url.params["date_finish"])
+        for request in requests
+    ) == sorted((parser._format_date(start), parser._format_date(end)) for start, end in windows)
+    assert sorted(street for _, street, _, _ in result.items()) == sorted(
+        ["street name", *(f"chunk {index}" for index in range(len(windows)))]
+    )
+    assert list(result.find(Address.from_string("ул. Street Name д.76")).values()) == [
+        {DateRange(datetime.datetime(2024, 6, 1, 9), datetime.datetime(2024, 6, 2, 17))}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_parse_schedule__pages_budget_and_failed_page(data_path, page_rows, monkeypatch):
+    monkeypatch.setattr(Parser, "chunk_days", 7)
+    monkeypatch.setattr(Parser, "max_pages", 3)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        page = int(request.url.params.get("PAGEN_1", 1))
+        if page == 2:
+            return httpx.Response(503)
+        links = '<a href="?PAGEN_1=2">2</a><a href="?PAGEN_1=3">3</a>' if page == 1 else ""
+        rows = page_rows[:1] if page == 1 else page_rows[1:]
+        return httpx.Response(200, text=make_page(rows).replace("</table>", f"</table>{links}"))
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+
+    result = await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    # linked pages are limited for the whole parsing (not per chunk), failed page is skipped
+    assert len(requests) == len(parser._get_windows()) + 3
+    assert sorted(street for _, street, _, _ in result.items()) == ["avenue name", "street name"]
+
+
+@pytest.mark.asyncio
+async def test_parse_schedule__parsed_results_keyed_by_provider(
+    data_path, http_client, single_window, monkeypatch
+):
+    parser = Parser(city=SupportedCity.SPB, http_client=http_client)
+    result = await parser.parse_schedule(SupportedService.ELECTRICITY)
+
+    # the same bytes are parsed by re-registered provider with other layout
+    provider = get_provider(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    monkeypatch.setattr("src.parsing.registry._providers", {})
+    register_provider(provider._replace(layout=provider.layout._replace(dates=slice(0, 4))))
+    reparsed_result = await parser.parse_schedule(SupportedService.ELECTRICITY, refresh=True)
+
+    assert len(result) == 2
+    assert len(Parser._parsed_results) == 2
+    assert reparsed_result is not result
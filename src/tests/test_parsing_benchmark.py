@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from src.config.app import SupportedCity, SupportedService
+from src.parsing.main_parsing import Parser
+from src.tests.conftest import make_page, make_rows, record_benchmark
+
+# regression threshold (can be tuned for slow CI runners)
+MIN_ROWS_PER_SEC = int(os.getenv("BENCHMARK_MIN_ROWS_PER_SEC", "1000"))
+# parses the page in a fresh process and prints its peak RSS growth (in KiB): the peak is reset
+# (see "clear_refs" in proc(5)) after the page is built, so only parsing is measured
+PEAK_RSS_SCRIPT = textwrap.dedent(
+    """
+    import sys
+    from unittest import mock
+    from src.config.app import SupportedCity, SupportedService
+    from src.parsing.main_parsing import Parser
+    from src.tests.conftest import make_page, make_rows
+
+    def read_status(name):
+        with open("/proc/self/status") as status:
+            return next(int(line.split()[1]) for line in status if line.startswith(name))
+
+    html_content = make_page(make_rows(int(sys.argv[1])))
+    parser = Parser(city=SupportedCity.SPB, http_client=mock.Mock(), cache=mock.Mock())
+    parser.streaming = sys.argv[2] == "streaming"
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    baseline = read_status("VmRSS:")
+    parser._parse_content(SupportedService.ELECTRICITY, None, html_content)
+    print(read_status("VmHWM:") - baseline)
+    """
+)
+
+
+def measure_peak_rss(rows_count: int, streaming: bool) -> int:
+    """
+    Peak RSS growth (in bytes) of parsing: unlike tracemalloc, it includes libxml2's
+    allocations (e.g. the whole page's DOM), so streaming and DOM modes are comparable
+    """
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            PEAK_RSS_SCRIPT,
+            str(rows_count),
+            "streaming" if streaming else "dom",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[2],
+    ).stdout
+    return int(output.strip()) * 1024
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs"), reason="Linux only")
+@pytest.mark.parametrize("streaming", [True, False], ids=["streaming", "dom"])
+@pytest.mark.parametrize("rows_count", [10, 1_000, 10_000, 100_000])
+def test_parse_content(request, rows_count, streaming):
+    html_content = make_page(make_rows(rows_count))
+    parser = Parser(city=SupportedCity.SPB, http_client=mock.Mock(), cache=mock.Mock())
+    parser.streaming = streaming
+
+    started_at = time.perf_counter()
+    result = parser._parse_content(SupportedService.ELECTRICITY, None, html_content)
+    elapsed = time.perf_counter() - started_at
+
+    # memory is measured by separate process (peak RSS can't be reset within this one)
+    peak_memory = measure_peak_rss(rows_count, streaming)
+
+    rows_per_sec = record_benchmark(request, rows_count, elapsed, peak_memory=peak_memory)
+    assert result
+    assert rows_per_sec >= MIN_ROWS_PER_SEC
@@ -0,0 +1,208 @@
+import asyncio
+import datetime
+from unittest import mock
+
+import pytest
+
+from src.config.app import SupportedService, SupportedCity, SERVICE_NAME_MAP
+from src.handlers.helpers import fetch_shutdowns
+from src.parsing.breaker import CircuitOpenError
+from src.parsing.main_parsing import Parser
+from src.providers.scheduler import get_schedule_refresher
+from src.providers.shutdowns import ShutDownProvider
+
+
+@pytest.mark.asyncio
+async def test_for_address__answers_from_snapshot(
+    data_path, db_engine, shared_http_client, requests
+):
+    refreshed = []
+
+    async def on_refresh(city, service, schedule, diff):
+        refreshed.append((city, service))
+
+    refresher = get_schedule_refresher()
+    refresher.on_refresh.append(on_refresh)
+    await refresher.refresh_all()
+    await refresher.wait_callbacks()
+
+    shutdowns = await ShutDownProvider.for_address(
+        "ул. Street Name д.76", SupportedService.ELECTRICITY
+    )
+
+    assert refreshed == [(SupportedCity.SPB, SupportedService.ELECTRICITY)]
+    assert len(requests) == len(Parser(city=SupportedCity.SPB)._get_windows())
+    assert [shutdown.raw_address for shutdown in shutdowns] == ["ул. Street Name д.75-77"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_all__keeps_previous_snapshot_on_failure(
+    data_path, db_engine, shared_http_client, monkeypatch
+):
+    refresher = get_schedule_refresher()
+    await refresher.refresh_all()
+    snapshot = refresher.get(SupportedCity.SPB, SupportedService.ELECTRICITY)
+
+    async def fetch_schedule(*args, **kwargs):
+        raise RuntimeError("upstream is down")
+
+    monkeypatch.setattr(Parser, "fetch_schedule", fetch_schedule)
+    await refresher.refresh_all()
+
+    assert refresher.get(SupportedCity.SPB, SupportedService.ELECTRICITY) is snapshot
+
+
+@pytest.mark.asyncio
+async def test_for_addresses__concurrent_partial_result(
+    data_path, db_engine, shared_http_client, requests, monkeypatch
+):
+    for_address = ShutDownProvider.for_address_by_service.__func__
+
+    async def failing_for_address(cls, address, service):
+        if address == "ул. Broken д.1":
+            raise RuntimeError("broken address")
+        return await for_address(cls, address, service)
+
+    monkeypatch.setattr(
+        ShutDownProvider, "for_address_by_service", classmethod(failing_for_address)
+    )
+
+    result = await ShutDownProvider.for_addresses(
+        ["ул. Street Name д.75", "ул. Broken д.1", "ул. Street Name д.77"]
+    )
+
+    assert len(requests) == len(Parser(city=SupportedCity.SPB)._get_windows())
+    assert [info.shutdowns[0].raw_address for info in result.shutdowns] == [
+        "ул. Street Name д.75-77",
+        "ул. Street Name д.75-77",
+    ]
+    assert result.failed == [(SupportedService.ELECTRICITY, "ул. Broken д.1")]
+
+
+@pytest.mark.asyncio
+async def test_for_address__stale_snapshot_served(data_path, db_engine, shared_http_client):
+    refresher = get_schedule_refresher()
+    snapshot = await refresher.refresh(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    refresher._snapshots[(SupportedCity.SPB, SupportedService.ELECTRICITY)] = snapshot._replace(
+        refreshed_at=snapshot.refreshed_at - refresher.stale_after - 1
+    )
+
+    result = await ShutDownProvider.for_address_by_service(
+        "ул. Street Name д.76", SupportedService.ELECTRICITY
+    )
+    await asyncio.gather(*refresher._refreshing.values())  # background refreshing
+
+    assert result.stale_since is not None
+    assert len(result.shutdowns) == 1
+    assert not refresher.is_stale(refresher.get(SupportedCity.SPB, SupportedService.ELECTRICITY))
+
+
+@pytest.mark.asyncio
+async def test_for_address__restored_snapshot_after_restart(
+    data_path, db_engine, shared_http_client, monkeypatch
+):
+    snapshot = await get_schedule_refresher().refresh(
+        SupportedCity.SPB, SupportedService.ELECTRICITY
+    )
+
+    async def fetch_schedule(*args, **kwargs):
+        raise CircuitOpenError("upstream is down")
+
+    # emulate restart of the app while the upstream is down
+    monkeypatch.setattr("src.providers.scheduler._schedule_refresher", None)
+    monkeypatch.setattr(Parser, "fetch_schedule", fetch_schedule)
+    refresher = get_schedule_refresher()
+    result = await ShutDownProvider.for_address_by_service(
+        "ул. Street Name д.76", SupportedService.ELECTRICITY
+    )
+    await asyncio.gather(*refresher._refreshing.values(), return_exceptions=True)
+
+    assert [shutdown.raw_address for shutdown in result.shutdowns] == ["ул. Street Name д.75-77"]
+    assert result.stale_since == datetime.datetime.fromtimestamp(snapshot.fetched_at)
+    assert refresher.is_stale(refresher.get(SupportedCity.SPB, SupportedService.ELECTRICITY))
+
+
+@pytest.mark.asyncio
+async def test_refresh__unchanged_schedule_has_empty_diff(data_path, db_engine, shared_http_client):
+    diffs = []
+
+    async def on_refresh(city, service, schedule, diff):
+        diffs.append(diff)
+
+    refresher = get_schedule_refresher()
+    refresher.on_refresh.append(on_refresh)
+    first = await refresher.refresh(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    second = await refresher.refresh(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    await refresher.wait_callbacks()
+
+    assert len(first.diff.added) == 2
+    assert not second.diff
+    assert diffs == [first.diff, second.diff]
+
+
+@pytest.mark.asyncio
+async def test_refresh__not_blocked_by_callbacks(
+    data_path, db_engine, shared_http_client, requests
+):
+    finished = asyncio.Event()
+
+    async def on_refresh(city, service, schedule, diff):
+        await finished.wait()  # e.g. notifying of all subscribers
+
+    refresher = get_schedule_refresher()
+    refresher.on_refresh.append(on_refresh)
+    first = await refresher.refresh(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    second = await refresher.refresh(SupportedCity.SPB, SupportedService.ELECTRICITY)
+
+    # cached pages aren't expired yet: they aren't fetched again, the data's time is kept
+    assert len(requests) == len(Parser(city=SupportedCity.SPB)._get_windows())
+    assert second.fetched_at == first.fetched_at
+    assert second.refreshed_at >= first.refreshed_at
+    assert refresher._callbacks
+    finished.set()
+    await refresher.wait_callbacks()
+    assert not refresher._callbacks
+
+
+@pytest.mark.asyncio
+async def test_fetch_shutdowns__unavailable_upstream(monkeypatch):
+    async def for_address_by_service(cls, address, service):
+        raise CircuitOpenError("upstream is down")
+
+    monkeypatch.setattr(
+        ShutDownProvider, "for_address_by_service", classmethod(for_address_by_service)
+    )
+    state = mock.AsyncMock()
+    state.get_data.return_value = {"addresses": ["ул. Street Name д.75"]}
+
+    assert await fetch_shutdowns(state) == [
+        f"Schedule of {SERVICE_NAME_MAP[SupportedService.ELECTRICITY]} is unavailable, try later"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_close__waits_for_callbacks(data_path, db_engine, shared_http_client):
+    notified = []
+    blocked = asyncio.Event()
+
+    async def on_refresh(city, service, schedule, diff):
+        await asyncio.sleep(0.01)
+        notified.append(service)
+
+    async def blocked_on_refresh(city, service, schedule, diff):
+        await blocked.wait()  # e.g. hung sending
+        notified.append("blocked")
+
+    refresher = get_schedule_refresher()
+    refresher.on_refresh.append(on_refresh)
+    await refresher.refresh(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    await refresher.close()
+
+    assert notified == [SupportedService.ELECTRICITY]
+
+    refresher.on_refresh.append(blocked_on_refresh)
+    await refresher.refresh(SupportedCity.SPB, SupportedService.ELECTRICITY)
+    await refresher.close(timeout=0.1)
+
+    assert notified == [SupportedService.ELECTRICITY] * 2
+    assert not refresher._callbacks
@@ -0,0 +1,99 @@
+import json
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from src.db.storage import TGStorage
+
+
+@pytest.fixture
+def storage_key() -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+@pytest.fixture
+def legacy_data_file(tmp_path, monkeypatch):
+    file_path = tmp_path / "user_address.json"
+    monkeypatch.setattr(TGStorage, "legacy_data_file_path", file_path)
+    return file_path
+
+
+@pytest.mark.asyncio
+async def test_set_and_get_data(db_engine, legacy_data_file, storage_key):
+    storage = TGStorage(engine=db_engine)
+    await storage.set_data(storage_key, {"addresses": ["ул. Street Name д.75"]})
+    await storage.close()
+
+    # new instance: data is loaded lazily from DB
+    storage = TGStorage(engine=db_engine)
+    assert storage.storage == {}
+    assert await storage.get_data(storage_key) == {"addresses": ["ул. Street Name д.75"]}
+    assert await storage.get_data(StorageKey(bot_id=1, chat_id=20, user_id=20)) == {}
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_migrate_from_legacy_file(db_engine, legacy_data_file, storage_key):
+    legacy_data_file.write_text(json.dumps({"10": {"id": 10, "data": {"addresses": ["addr"]}}}))
+
+    storage = TGStorage(engine=db_engine)
+
+    assert await storage.get_data(storage_key) == {"addresses": ["addr"]}
+    assert not legacy_data_file.exists()
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_state_persisted(db_engine, legacy_data_file, storage_key):
+    storage = TGStorage(engine=db_engine)
+    await storage.set_state(storage_key, "UserAddressStatesGroup:add_address")
+    await storage.close()
+
+    storage = TGStorage(engine=db_engine)
+    assert await storage.get_state(storage_key) == "UserAddressStatesGroup:add_address"
+    await storage.set_state(storage_key, None)
+    await storage.close()
+
+    storage = TGStorage(engine=db_engine)
+    assert await storage.get_state(storage_key) is None
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind__batched_flush(db_engine, legacy_data_file, storage_key):
+    storage = TGStorage(engine=db_engine, flush_delay=0.01)
+    with mock.patch.object(storage, "_save_changes", wraps=storage._save_changes) as mock_save:
+        for index in range(5):
+            await storage.set_data(storage_key, {"addresses": [f"address {index}"]})
+            await storage.set_state(storage_key, f"state {index}")
+
+        await asyncio.sleep(0.05)
+
+    mock_save.assert_called_once()
+    await storage.close()
+
+    storage = TGStorage(engine=db_engine)
+    assert await storage.get_data(storage_key) == {"addresses": ["address 4"]}
+    assert await storage.get_state(storage_key) == "state 4"
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_close__in_flight_flush_not_lost(db_engine, legacy_data_file, storage_key):
+    storage = TGStorage(engine=db_engine, flush_delay=0.01)
+    save_changes = storage._save_changes
+    # the first write is still in progress (and isn't committed) when the storage is closed
+    side_effects = [lambda *args: time.sleep(0.1), save_changes]
+    with mock.patch.object(
+        storage, "_save_changes", side_effect=lambda *args: side_effects.pop(0)(*args)
+    ):
+        await storage.set_data(storage_key, {"addresses": ["address"]})
+        await asyncio.sleep(0.05)
+        await storage.close()
+
+    storage = TGStorage(engine=db_engine)
+    assert await storage.get_data(storage_key) == {"addresses": ["address"]}
+    await storage.close()
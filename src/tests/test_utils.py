@@ -0,0 +1,51 @@
+import re
+
+from src.utils import (
+    STREET_ELEMENTS,
+    ADDRESS_DEFAULT_PATTERN,
+    get_street_and_house,
+    _group_alternatives,
+)
+from src.tests.conftest import make_rows
+
+# the same pattern with plain (not grouped) alternation of street's types
+UNGROUPED_PATTERN = re.compile(
+    ADDRESS_DEFAULT_PATTERN.pattern.replace(_group_alternatives(STREET_ELEMENTS), STREET_ELEMENTS)
+)
+ADDRESSES = [
+    "ул. Ленина д.5",
+    "пр-кт Просвещения д.12-14",
+    "пр-д Светлый д. 3",
+    "Невский пр. д.1",
+    "наб. реки Мойки д. 10 корп.2",
+    "улица Садовая, дом 3",
+    "Some text",
+]
+
+
+def make_addresses(rows_count: int) -> list[str]:
+    """Address fragments as they are split from the schedule's rows"""
+    return [
+        address.strip() for row in make_rows(rows_count) for address in row["streets"].split(",")
+    ]
+
+
+def test_grouped_pattern__same_match():
+    for address in ADDRESSES + make_addresses(100):
+        expected = UNGROUPED_PATTERN.search(address)
+        match = ADDRESS_DEFAULT_PATTERN.search(address)
+
+        assert (match and match.groupdict()) == (expected and expected.groupdict()), address
+
+
+def test_get_street_and_house():
+    assert get_street_and_house("ул. Ленина д.12-14") == ("Ленина", range(12, 15))
+    assert get_street_and_house("Some text") == ("Unknown", range(0))
+
+
+def test_get_street_and_house__wide_range_is_lazy():
+    street, houses = get_street_and_house("ул. Ленина д.1-100000")
+
+    assert isinstance(houses, range)
+    assert (houses[0], houses[-1], len(houses)) == (1, 100000, 100000)
+    assert 500 in houses
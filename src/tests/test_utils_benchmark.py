@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from src.utils import ADDRESS_DEFAULT_PATTERN, get_street_and_house, _search_address
+from src.tests.conftest import record_benchmark
+from src.tests.test_utils import UNGROUPED_PATTERN, make_addresses
+
+SWEEPS_COUNT = 5  # the same addresses repeat across pages and sweeps
+
+
+def _search_uncached(addresses: list[str], pattern) -> None:
+    for address in addresses:
+        _search_address.__wrapped__(address, pattern)
+
+
+def _search_cached(addresses: list[str], _) -> None:
+    for address in addresses:
+        get_street_and_house(address)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "search, pattern",
+    [
+        (_search_uncached, UNGROUPED_PATTERN),
+        (_search_uncached, ADDRESS_DEFAULT_PATTERN),
+        (_search_cached, ADDRESS_DEFAULT_PATTERN),
+    ],
+    ids=["ungrouped", "grouped", "memoized"],
+)
+@pytest.mark.parametrize("rows_count", [1_000, 10_000])
+def test_search_address(request, rows_count, search, pattern):
+    addresses = make_addresses(rows_count) * SWEEPS_COUNT
+    _search_address.cache_clear()
+
+    started_at = time.perf_counter()
+    search(addresses, pattern)
+    elapsed = time.perf_counter() - started_at
+
+    record_benchmark(request, len(addresses), elapsed)
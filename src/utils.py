@@ -1,4 +1,5 @@
 import re
+import functools
 
 STREET_ELEMENTS = r"""
 ал\.?|
@@ -34,27 +35,67 @@ STREET_ELEMENTS = r"""
     """.replace("\n", "")
 
 
+# max count of memoized raw addresses (the same strings repeat across pages and refreshes)
+ADDRESS_CACHE_SIZE = 16 * 1024
+
+
+def _group_alternatives(alternatives: str) -> str:
+    """
+    Groups regexp's alternatives by their first (literal) character: "ул|пр|пер" -> "ул|п(?:р|ер)".
+    Only one group can match at the position, so the regexp engine doesn't try every alternative
+    (alternatives' order inside the group is kept, so the match is the same)
+    """
+    groups: dict[str, list[str]] = {}
+    for alternative in alternatives.split("|"):
+        groups.setdefault(alternative[:1], []).append(alternative[1:])
+
+    return "|".join(
+        f"{re.escape(first_char)}(?:{'|'.join(tails)})" for first_char, tails in groups.items()
+    )
+
+
 ADDRESS_DEFAULT_PATTERN = re.compile(
-    rf"^(?:{STREET_ELEMENTS})?\s?(?P<street_name>[\w\s.]+?),?\s(?:д\.?|дом)\s*(?P<start_house>\d+)(?:[-–](?P<end_house>\d+))?(?:\sкорп\.\d+)?"
+    rf"^(?:{_group_alternatives(STREET_ELEMENTS)})?\s?(?P<street_name>[\w\s.]+?),?\s(?:д\.?|дом)\s*(?P<start_house>\d+)(?:[-–](?P<end_house>\d+))?(?:\sкорп\.\d+)?"
 )
 
 
 def get_street_and_house(
     address: str,
     pattern: re.Pattern[str] | None = None,
-) -> tuple[str, list[int]]:
+) -> tuple[str, range]:
     """
     Searches street and house (or houses' range) from given string
+    (results are memoized, see ADDRESS_CACHE_SIZE).
+    Houses are returned as lazy range, so wide ranges (like "д.1-300") aren't materialized
 
     :param address: some string containing address with street and house (maybe range of houses)
     :param pattern: regexp's pattern for fetching street/houses from that
-    :return <tuple> like ("My Street", [12]) or ("My Street", [12, 13, 14, 15])
+    :return <tuple> like ("My Street", range(12, 13)) or ("My Street", range(12, 16))
     """
-    if match := (pattern or ADDRESS_DEFAULT_PATTERN).search(address):
-        street_name = match.group("street_name").strip()
-        start_house = int(match.group("start_house"))
-        end_house = int(match.group("end_house")) if match.group("end_house") else start_house
-        houses = list(range(start_house, end_house + 1))
-        return street_name, houses
+    if found := _search_address(address, pattern or ADDRESS_DEFAULT_PATTERN):
+        street_name, start_house, end_house = found
+        return street_name, range(start_house, end_house + 1)
     else:
-        return "Unknown", []
+        return "Unknown", range(0)
+
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _search_address(address: str, pattern: re.Pattern[str]) -> tuple[str, int, int] | None:
+    """Memoized matching of the address: (street, start house, end house) or None"""
+    if not (match := pattern.search(address)):
+        return None
+
+    start_house = int(match.group("start_house"))
+    end_house = int(match.group("end_house")) if match.group("end_house") else start_house
+    return match.group("street_name").strip(), start_house, end_house
+
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def normalize_street(street: str) -> str:
+    """
+    Normalized form of the street name (case, "ё" and extra whitespaces are ignored)
+
+    :param street: street's name (as it was extracted from the address)
+    :return <str> like "my street"
+    """
+    return " ".join(street.casefold().replace("ё", "е").split())